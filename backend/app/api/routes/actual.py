@@ -1,16 +1,32 @@
+import base64
+import json
 from datetime import date
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, distinct
+from sqlalchemy import and_, or_, distinct, func, literal_column
 
 from app.core.database import get_history_db
+from app.core.executor import task_executor
 from app.models.actual_models import ActualRecord, ForecastSnapshot
-from app.models.schemas import ActualRecordCreate, ActualRecordResponse
+from app.models.schemas import ActualRecordCreate, ActualRecordResponse, ActualBatchItem
+from app.services.actual_service import actual_service, CONFLICT_POLICIES
 from app.services.price_service import price_service
+from app.services.summary_service import summary_service
 
 router = APIRouter()
 
+# 목록 조회 페이지 크기 상한
+ACTUAL_PAGE_SIZE_MAX = 500
+
+# fields 파라미터로 선택 가능한 필드
+ACTUAL_FIELDS = (
+    "id", "date", "model", "process", "quantity", "unit_price", "revenue",
+    "created_at", "updated_at"
+)
+
 
 @router.get("/models-processes")
 async def get_forecast_models_processes(
@@ -33,22 +49,166 @@ async def get_forecast_models_processes(
 
 @router.get("", response_model=List[ActualRecordResponse])
 async def get_actual_records(
+    response: Response,
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
     model: Optional[str] = Query(None),
+    model_prefix: Optional[str] = Query(None),
+    process: Optional[str] = Query(None),
+    limit: Optional[int] = Query(None, ge=1),  # 페이지 크기 (limit/cursor 모두 없으면 전체 조회)
+    cursor: Optional[str] = Query(None),  # 이전 응답의 X-Next-Cursor 헤더 값
+    fields: Optional[str] = Query(None),  # 반환할 필드 (쉼표 구분, 예: date,model,quantity)
     db: Session = Depends(get_history_db)
 ):
-    """실적 데이터 조회"""
-    query = db.query(ActualRecord)
+    """실적 데이터 조회 (최신순, limit/cursor 지정 시 커서 페이지네이션)
+
+    페이지 조회면 최대 ACTUAL_PAGE_SIZE_MAX 건씩 반환하고 다음 페이지가 있으면 X-Next-Cursor 헤더를 붙인다.
+    limit/cursor 없이 호출하는 기존 화면(실적 입력, 이력)은 조건에 맞는 전체를 받는다.
+    """
+    columns = _parse_fields(fields)
+
+    query = _filter_records(db.query(ActualRecord), start_date, end_date, model, model_prefix, process)
+    if cursor:
+        cursor_date, cursor_id = _decode_cursor(cursor)
+        query = query.filter(or_(
+            ActualRecord.date < cursor_date,
+            and_(ActualRecord.date == cursor_date, ActualRecord.id < cursor_id)
+        ))
+
+    query = query.order_by(ActualRecord.date.desc(), ActualRecord.id.desc())
+
+    page_size = None
+    if limit or cursor:
+        page_size = min(limit or ACTUAL_PAGE_SIZE_MAX, ACTUAL_PAGE_SIZE_MAX)
+        # 다음 페이지 존재 여부 확인용으로 1건 더 조회
+        query = query.limit(page_size + 1)
+
+    if columns:
+        # 필드 지정 시 ORM 객체 없이 필요한 열만 조회 (커서용 date, id 포함)
+        selected = list(dict.fromkeys(columns + ["date", "id"]))
+        rows = [
+            dict(zip(selected, row))
+            for row in query.with_entities(*[getattr(ActualRecord, name) for name in selected])
+        ]
+    else:
+        rows = query.all()
+
+    next_cursor = None
+    if page_size is not None and len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        last_date, last_id = (last["date"], last["id"]) if columns else (last.date, last.id)
+        next_cursor = _encode_cursor(last_date, last_id)
+
+    if not columns:
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return rows
+
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return JSONResponse(
+        content=jsonable_encoder([{name: row[name] for name in columns} for row in rows]),
+        headers=headers
+    )
+
 
+@router.get("/export", response_model=List[ActualRecordResponse])
+async def export_actual_records(
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    model: Optional[str] = Query(None),
+    model_prefix: Optional[str] = Query(None),
+    process: Optional[str] = Query(None),
+    db: Session = Depends(get_history_db)
+):
+    """조건에 맞는 실적 전체 조회 (페이지 제한 없음 - 내보내기/기간 전체 집계용)"""
+    query = _filter_records(db.query(ActualRecord), start_date, end_date, model, model_prefix, process)
+    return query.order_by(ActualRecord.date.desc(), ActualRecord.id.desc()).all()
+
+
+def _filter_records(
+    query,
+    start_date: Optional[date],
+    end_date: Optional[date],
+    model: Optional[str],
+    model_prefix: Optional[str],
+    process: Optional[str]
+):
+    """실적 조회 공통 필터"""
     if start_date:
         query = query.filter(ActualRecord.date >= start_date)
     if end_date:
         query = query.filter(ActualRecord.date <= end_date)
     if model:
         query = query.filter(ActualRecord.model == model)
+    if model_prefix:
+        # LIKE 대신 범위 조건으로 인덱스 사용
+        query = query.filter(
+            ActualRecord.model >= model_prefix,
+            ActualRecord.model < model_prefix + "\uffff"
+        )
+    if process:
+        query = query.filter(ActualRecord.process == process)
+    return query
+
+
+def _parse_fields(fields: Optional[str]) -> List[str]:
+    """fields 파라미터 검증 (허용되지 않은 필드면 400)"""
+    if not fields:
+        return []
+    columns = [name.strip() for name in fields.split(",") if name.strip()]
+    invalid = [name for name in columns if name not in ACTUAL_FIELDS]
+    if invalid:
+        raise HTTPException(
+            status_code=400,
+            detail=f"알 수 없는 필드입니다: {', '.join(invalid)} (사용 가능: {', '.join(ACTUAL_FIELDS)})"
+        )
+    return columns
+
+
+def _encode_cursor(cursor_date: date, cursor_id: int) -> str:
+    """마지막 행의 (date, id)를 불투명 커서 문자열로 변환"""
+    payload = json.dumps({"d": cursor_date.isoformat(), "i": cursor_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[date, int]:
+    """커서 문자열을 (date, id)로 변환 (형식 오류면 400)"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return date.fromisoformat(payload["d"]), int(payload["i"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="유효하지 않은 커서입니다")
+
+
+def _calculate_revenue(request: ActualRecordCreate) -> Tuple[float, float]:
+    """실적 날짜 시점 모델 기본 단가와 매출 (단가 없으면 400)"""
+    result = price_service.calculate_revenues(
+        [request.model], None, [request.quantity], [request.date]
+    )
+    if result["missing"][0]:
+        raise HTTPException(status_code=400, detail=f"모델 '{request.model}'의 단가 정보가 없습니다")
+    return float(result["unit_prices"][0]), float(result["revenues"][0])
+
+
+def _check_duplicate(db: Session, request: ActualRecordCreate, exclude_id: Optional[int] = None):
+    """같은 (날짜, 모델, 공정) 기록이 있으면 409 (공정 없음은 빈 문자열과 같은 키)"""
+    query = db.query(ActualRecord.id).filter(
+        and_(
+            ActualRecord.date == request.date,
+            ActualRecord.model == request.model,
+            func.coalesce(ActualRecord.process, literal_column("''")) == (request.process or "")
+        )
+    )
+    if exclude_id is not None:
+        query = query.filter(ActualRecord.id != exclude_id)
 
-    return query.order_by(ActualRecord.date.desc()).all()
+    if query.first():
+        raise HTTPException(
+            status_code=409,
+            detail=f"해당 날짜({request.date})에 모델 '{request.model}' 공정 '{request.process}'의 기록이 이미 있습니다"
+        )
 
 
 @router.get("/{record_id}", response_model=ActualRecordResponse)
@@ -69,28 +229,11 @@ async def create_actual_record(
     db: Session = Depends(get_history_db)
 ):
     """실적 데이터 입력"""
-    # 단가 조회
-    unit_price = price_service.get_price(request.model)
-    if unit_price is None:
-        raise HTTPException(status_code=400, detail=f"모델 '{request.model}'의 단가 정보가 없습니다")
-
-    # 매출 계산
-    revenue = unit_price * request.quantity
+    # 실적 날짜 시점 단가로 매출 계산 (모델 기본 단가)
+    unit_price, revenue = _calculate_revenue(request)
 
     # 중복 체크 (날짜, 모델, 공정 조합)
-    existing = db.query(ActualRecord).filter(
-        and_(
-            ActualRecord.date == request.date,
-            ActualRecord.model == request.model,
-            ActualRecord.process == request.process
-        )
-    ).first()
-
-    if existing:
-        raise HTTPException(
-            status_code=409,
-            detail=f"해당 날짜({request.date})에 모델 '{request.model}' 공정 '{request.process}'의 기록이 이미 있습니다"
-        )
+    _check_duplicate(db, request)
 
     # 저장
     record = ActualRecord(
@@ -103,6 +246,7 @@ async def create_actual_record(
     )
 
     db.add(record)
+    summary_service.apply_actual_changes(db, [summary_service.actual_change(record)])
     db.commit()
     db.refresh(record)
 
@@ -120,18 +264,24 @@ async def update_actual_record(
     if not record:
         raise HTTPException(status_code=404, detail="기록을 찾을 수 없습니다")
 
-    # 단가 조회
-    unit_price = price_service.get_price(request.model)
-    if unit_price is None:
-        raise HTTPException(status_code=400, detail=f"모델 '{request.model}'의 단가 정보가 없습니다")
+    # 실적 날짜 시점 단가로 매출 계산 (모델 기본 단가)
+    unit_price, revenue = _calculate_revenue(request)
+
+    # 다른 기록과 (날짜, 모델, 공정) 중복 체크
+    _check_duplicate(db, request, exclude_id=record_id)
+
+    # 요약 롤업: 기존 값 차감 후 새 값 반영
+    changes = [summary_service.actual_change(record, -1)]
 
     record.date = request.date
     record.model = request.model
     record.process = request.process
     record.quantity = request.quantity
     record.unit_price = unit_price
-    record.revenue = unit_price * request.quantity
+    record.revenue = revenue
 
+    changes.append(summary_service.actual_change(record))
+    summary_service.apply_actual_changes(db, changes)
     db.commit()
     db.refresh(record)
 
@@ -149,6 +299,7 @@ async def delete_actual_record(
         raise HTTPException(status_code=404, detail="기록을 찾을 수 없습니다")
 
     db.delete(record)
+    summary_service.apply_actual_changes(db, [summary_service.actual_change(record, -1)])
     db.commit()
 
     return {"success": True, "deleted_id": record_id}
@@ -156,38 +307,17 @@ async def delete_actual_record(
 
 @router.post("/batch")
 async def create_batch_records(
-    records: List[ActualRecordCreate],
+    records: List[ActualBatchItem],
+    on_conflict: str = Query("error", description="기존 기록과 겹칠 때 기본 정책: skip, overwrite, error"),
     db: Session = Depends(get_history_db)
 ):
-    """실적 데이터 일괄 입력"""
-    created = []
-    errors = []
-
-    for req in records:
-        try:
-            unit_price = price_service.get_price(req.model)
-            if unit_price is None:
-                errors.append({"model": req.model, "error": "단가 정보 없음"})
-                continue
-
-            record = ActualRecord(
-                date=req.date,
-                model=req.model,
-                process=req.process,
-                quantity=req.quantity,
-                unit_price=unit_price,
-                revenue=unit_price * req.quantity
-            )
-            db.add(record)
-            created.append(req.model)
-        except Exception as e:
-            errors.append({"model": req.model, "error": str(e)})
-
-    db.commit()
+    """실적 데이터 일괄 입력 (항목별 on_conflict 가 없으면 쿼리의 기본 정책 적용)"""
+    policies = {on_conflict} | {req.on_conflict for req in records if req.on_conflict}
+    invalid = policies - set(CONFLICT_POLICIES)
+    if invalid:
+        raise HTTPException(
+            status_code=400,
+            detail=f"알 수 없는 on_conflict 입니다: {', '.join(sorted(invalid))} (사용 가능: {', '.join(CONFLICT_POLICIES)})"
+        )
 
-    return {
-        "success": True,
-        "created_count": len(created),
-        "error_count": len(errors),
-        "errors": errors
-    }
+    return await task_executor.run_io(actual_service.create_batch, db, records, on_conflict)
@@ -1,22 +1,27 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File
+from datetime import date
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
 from fastapi.responses import Response
 from typing import List, Optional
 from pydantic import BaseModel
+from sqlalchemy.orm import Session
 import pandas as pd
 from io import BytesIO
 
+from app.core.database import get_history_db
+from app.core.executor import task_executor
 from app.services.price_service import price_service
+from app.services.reprice_service import reprice_service
+from app.services.price_validation import PriceFileError, check_price_frame, validate_price_file
 from app.models.schemas import PriceItem, PriceMasterResponse
 
 router = APIRouter()
 
-VALID_PROCESSES = ['CNC 1 ~ CNC 2', 'CL1 ~ CL2', 'TRI']
-
 
 class PriceCreateRequest(BaseModel):
     model: str
     unit_price: float
     process: Optional[str] = ""
+    effective_from: Optional[date] = None  # 유효 시작일 (오늘 이전만 가능)
 
 
 class BulkPriceItem(BaseModel):
@@ -27,6 +32,7 @@ class BulkPriceItem(BaseModel):
 
 class BulkPriceRequest(BaseModel):
     prices: List[BulkPriceItem]
+    effective_from: Optional[date] = None  # 유효 시작일 (오늘 이전만 가능)
 
 
 class ValidationError(BaseModel):
@@ -114,77 +120,15 @@ async def validate_upload(file: UploadFile = File(...)):
     if not file.filename.endswith(('.xlsx', '.xls')):
         raise HTTPException(status_code=400, detail="Excel 파일(.xlsx, .xls)만 지원합니다")
 
+    contents = await file.read()
+
     try:
-        contents = await file.read()
-        df = pd.read_excel(BytesIO(contents))
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"파일을 읽을 수 없습니다: {str(e)}")
-
-    # Check required columns
-    required_columns = {"모델", "공정", "단가($)"}
-    actual_columns = set(df.columns)
-
-    if not required_columns.issubset(actual_columns):
-        missing = required_columns - actual_columns
-        raise HTTPException(
-            status_code=400,
-            detail=f"필수 컬럼이 누락되었습니다: {', '.join(missing)}"
-        )
+        # Excel 읽기/검증은 CPU 작업이므로 프로세스 풀에서 실행
+        result = await task_executor.run_cpu(validate_price_file, contents)
+    except PriceFileError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    errors = []
-    valid_items = []
-
-    for idx, row in df.iterrows():
-        row_num = idx + 2  # Excel row number (1-indexed + header)
-
-        # Validate model
-        model = str(row.get("모델", "")).strip()
-        if not model or model == "nan":
-            errors.append(ValidationError(row=row_num, field="모델", message="모델명이 비어있습니다"))
-            continue
-
-        # Validate process
-        process = str(row.get("공정", "")).strip().upper()
-        if not process or process == "NAN":
-            errors.append(ValidationError(row=row_num, field="공정", message="공정이 비어있습니다"))
-            continue
-        if process not in VALID_PROCESSES:
-            errors.append(ValidationError(
-                row=row_num,
-                field="공정",
-                message=f"유효하지 않은 공정입니다. ({', '.join(VALID_PROCESSES)} 중 선택)"
-            ))
-            continue
-
-        # Validate price
-        try:
-            price_value = row.get("단가($)")
-            if pd.isna(price_value):
-                errors.append(ValidationError(row=row_num, field="단가($)", message="단가가 비어있습니다"))
-                continue
-            unit_price = float(price_value)
-            if unit_price <= 0:
-                errors.append(ValidationError(row=row_num, field="단가($)", message="단가는 0보다 커야 합니다"))
-                continue
-        except (ValueError, TypeError):
-            errors.append(ValidationError(row=row_num, field="단가($)", message="단가는 숫자여야 합니다"))
-            continue
-
-        valid_items.append(BulkPriceItem(model=model, process=process, unit_price=unit_price))
-
-    total_rows = len(df)
-    error_rows = len(errors)
-    valid_rows = len(valid_items)
-    is_valid = error_rows == 0 and valid_rows > 0
-
-    return ValidationResult(
-        valid=is_valid,
-        total_rows=total_rows,
-        valid_rows=valid_rows,
-        error_rows=error_rows,
-        errors=errors,
-        preview=valid_items
-    )
+    return ValidationResult(**result)
 
 
 @router.post("/bulk")
@@ -193,15 +137,23 @@ async def bulk_register(request: BulkPriceRequest):
     if not request.prices:
         raise HTTPException(status_code=400, detail="등록할 단가 데이터가 없습니다")
 
-    registered = 0
-    errors = []
+    # 업로드 검증과 같은 규칙으로 먼저 걸러 잘못된 행만 오류로 보고
+    frame = pd.DataFrame([item.model_dump() for item in request.prices])
+    valid, invalid_rows = check_price_frame(frame, strict=True)
+    errors = [
+        {"model": request.prices[e["row"] - 2].model, "error": e["message"]}
+        for e in invalid_rows
+    ]
 
-    for item in request.prices:
-        try:
-            price_service.add_price(item.model, item.unit_price, item.process)
-            registered += 1
-        except Exception as e:
-            errors.append({"model": item.model, "error": str(e)})
+    # 나머지는 한 트랜잭션으로 일괄 저장
+    try:
+        registered = await task_executor.run_io(
+            price_service.bulk_register,
+            list(valid.itertuples(index=False, name=None)),
+            request.effective_from
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     return {
         "success": True,
@@ -211,6 +163,32 @@ async def bulk_register(request: BulkPriceRequest):
     }
 
 
+@router.get("/export")
+async def export_prices():
+    """현재 단가 마스터 Excel 내보내기"""
+    content = await task_executor.run_io(price_service.export_xlsx)
+
+    return Response(
+        content=content,
+        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        headers={
+            "Content-Disposition": "attachment; filename=price_master.xlsx",
+            "Content-Length": str(len(content))
+        }
+    )
+
+
+@router.post("/reprice")
+async def reprice_revenue(
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    db: Session = Depends(get_history_db)
+):
+    """단가 이력 기준으로 기간 내 실적/forecast 매출 재계산 (기간 없으면 전체)"""
+    result = await task_executor.run_io(reprice_service.reprice, db, start_date, end_date)
+    return {"success": True, **result}
+
+
 @router.get("/{model}")
 async def get_price(model: str):
     """모델별 단가 조회"""
@@ -227,7 +205,13 @@ async def get_price(model: str):
 @router.post("")
 async def add_price(request: PriceCreateRequest):
     """단가 추가/수정"""
-    price_service.add_price(request.model, request.unit_price, request.process or "")
+    try:
+        await task_executor.run_io(
+            price_service.add_price,
+            request.model, request.unit_price, request.process or "", request.effective_from
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return {
         "success": True,
         "model": request.model,
@@ -239,6 +223,6 @@ async def add_price(request: PriceCreateRequest):
 @router.delete("/{model}")
 async def delete_price(model: str, process: Optional[str] = ""):
     """단가 삭제 (모델+공정)"""
-    if not price_service.delete_price(model, process or ""):
+    if not await task_executor.run_io(price_service.delete_price, model, process or ""):
         raise HTTPException(status_code=404, detail="단가 정보가 없습니다")
     return {"success": True, "model": model, "process": process}
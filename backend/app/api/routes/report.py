@@ -1,14 +1,16 @@
 from datetime import date, timedelta
 from typing import Optional
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 
 from app.core.database import get_history_db
-from app.models.actual_models import ActualRecord, ForecastSnapshot
-from app.models.schemas import (
-    RevenueReportResponse, RevenueItem, RevenueSummary, DashboardMetrics
-)
+from app.core.executor import task_executor
+from app.models.actual_models import ActualRecord, ForecastSnapshot, DailySummary
+from app.models.schemas import RevenueReportResponse, DashboardMetrics, ForecastUploadInfo
+from app.services.report_service import report_service, GROUP_BY_OPTIONS
+from app.services.snapshot_catalog_service import snapshot_catalog_service
+from app.services.summary_service import summary_service
 
 router = APIRouter()
 
@@ -18,77 +20,20 @@ async def get_revenue_report(
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
     view_mode: str = Query("combined"),  # actual, forecast, combined
+    group_by: Optional[str] = Query(None),  # day, week, month, model, process
+    detail: Optional[bool] = Query(None),  # 행 단위 상세 포함 (기본: group_by 없을 때만)
     db: Session = Depends(get_history_db)
 ):
     """매출 리포트 조회"""
-    today = date.today()
-
-    if not start_date:
-        start_date = today.replace(day=1)  # 이번 달 1일
-    if not end_date:
-        end_date = (start_date.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
-
-    items = []
-
-    # 실적 데이터 (actual)
-    if view_mode in ["actual", "combined"]:
-        actual_records = db.query(ActualRecord).filter(
-            ActualRecord.date >= start_date,
-            ActualRecord.date <= end_date
-        ).all()
-
-        for record in actual_records:
-            items.append(RevenueItem(
-                date=record.date,
-                model=record.model,
-                process=record.process,
-                record_type="actual",
-                quantity=record.quantity,
-                revenue=record.revenue
-            ))
-
-    # 예상 데이터 (forecast)
-    if view_mode in ["forecast", "combined"]:
-        # 가장 최근 업로드된 forecast 스냅샷 사용
-        latest_upload = db.query(func.max(ForecastSnapshot.upload_date)).scalar()
-
-        if latest_upload:
-            # 사용자가 선택한 기간의 모든 forecast 데이터 조회
-            forecast_records = db.query(ForecastSnapshot).filter(
-                ForecastSnapshot.upload_date == latest_upload,
-                ForecastSnapshot.forecast_date >= start_date,
-                ForecastSnapshot.forecast_date <= end_date
-            ).all()
-
-            for record in forecast_records:
-                items.append(RevenueItem(
-                    date=record.forecast_date,
-                    model=record.model,
-                    process=record.process,
-                    record_type="forecast",
-                    quantity=record.quantity,
-                    revenue=record.revenue
-                ))
-
-    # 날짜순 정렬
-    items.sort(key=lambda x: (x.date, x.model))
-
-    # 요약 계산
-    actual_revenue = sum(i.revenue for i in items if i.record_type == "actual")
-    forecast_revenue = sum(i.revenue for i in items if i.record_type == "forecast")
-    total_revenue = actual_revenue + forecast_revenue
-    achievement_rate = (actual_revenue / total_revenue * 100) if total_revenue > 0 else 0
-
-    return RevenueReportResponse(
-        items=items,
-        summary=RevenueSummary(
-            actual_revenue=actual_revenue,
-            forecast_revenue=forecast_revenue,
-            total_revenue=total_revenue,
-            achievement_rate=round(achievement_rate, 1)
-        ),
-        period_start=start_date,
-        period_end=end_date
+    if group_by and group_by not in GROUP_BY_OPTIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"group_by는 {', '.join(GROUP_BY_OPTIONS)} 중 하나여야 합니다"
+        )
+
+    return await task_executor.run_io(
+        report_service.build_revenue_report,
+        db, start_date, end_date, view_mode, group_by, detail
     )
 
 
@@ -97,34 +42,34 @@ async def get_dashboard_metrics(
     db: Session = Depends(get_history_db)
 ):
     """대시보드 지표 조회"""
+    return await task_executor.run_io(_build_dashboard_metrics, db)
+
+
+def _build_dashboard_metrics(db: Session) -> DashboardMetrics:
+    """대시보드 지표 계산 (일간 요약 롤업 기준 - 이번 달 일자 수만큼만 조회)"""
     today = date.today()
     month_start = today.replace(day=1)
 
     # MTD 실적
-    mtd_actual = db.query(func.sum(ActualRecord.revenue)).filter(
-        ActualRecord.date >= month_start,
-        ActualRecord.date <= today
+    mtd_actual = db.query(func.sum(DailySummary.total_actual_revenue)).filter(
+        DailySummary.date >= month_start,
+        DailySummary.date <= today
     ).scalar() or 0
 
-    # 최신 forecast에서 남은 달 예상
-    latest_upload = db.query(func.max(ForecastSnapshot.upload_date)).scalar()
-    mtd_forecast = 0
-
-    if latest_upload:
-        mtd_forecast = db.query(func.sum(ForecastSnapshot.revenue)).filter(
-            ForecastSnapshot.upload_date == latest_upload,
-            ForecastSnapshot.forecast_date > today,
-            ForecastSnapshot.forecast_date <= today.replace(day=28) + timedelta(days=4)
-        ).scalar() or 0
+    # 최신 forecast에서 남은 달 예상 (롤업의 forecast 열은 최신 업로드 기준)
+    mtd_forecast = db.query(func.sum(DailySummary.total_forecast_revenue)).filter(
+        DailySummary.date > today,
+        DailySummary.date <= today.replace(day=28) + timedelta(days=4)
+    ).scalar() or 0
 
     monthly_target = mtd_actual + mtd_forecast
     achievement_rate = (mtd_actual / monthly_target * 100) if monthly_target > 0 else 0
 
     # 오늘 상태
-    today_record = db.query(ActualRecord).filter(
-        ActualRecord.date == today
-    ).first()
-    today_status = "입력 완료" if today_record else "대기중"
+    today_count = db.query(DailySummary.actual_record_count).filter(
+        DailySummary.date == today
+    ).scalar()
+    today_status = "입력 완료" if today_count else "대기중"
 
     return DashboardMetrics(
         mtd_actual=int(mtd_actual),
@@ -135,6 +80,13 @@ async def get_dashboard_metrics(
     )
 
 
+@router.post("/summary/rebuild")
+async def rebuild_summary(db: Session = Depends(get_history_db)):
+    """일간 요약 롤업 재생성 (원본 데이터 기준)"""
+    days = await task_executor.run_io(summary_service.rebuild, db)
+    return {"success": True, "day_count": days}
+
+
 @router.get("/export")
 async def export_report(
     start_date: Optional[date] = Query(None),
@@ -149,11 +101,17 @@ async def export_report(
 @router.get("/debug/db-info")
 async def get_db_info(db: Session = Depends(get_history_db)):
     """DB 저장 데이터 정보 조회 (디버그용)"""
-    # Forecast 데이터 정보
-    forecast_count = db.query(func.count(ForecastSnapshot.id)).scalar() or 0
-    forecast_min_date = db.query(func.min(ForecastSnapshot.forecast_date)).scalar()
-    forecast_max_date = db.query(func.max(ForecastSnapshot.forecast_date)).scalar()
-    latest_upload = db.query(func.max(ForecastSnapshot.upload_date)).scalar()
+    return await task_executor.run_io(_collect_db_info, db)
+
+
+def _collect_db_info(db: Session) -> dict:
+    """DB 저장 데이터 정보 수집"""
+    # Forecast 데이터 정보 (업로드 카탈로그 기준)
+    uploads = snapshot_catalog_service.get_uploads(db)
+    forecast_count = sum(u.row_count for u in uploads)
+    forecast_min_date = min((u.first_forecast_date for u in uploads if u.first_forecast_date), default=None)
+    forecast_max_date = max((u.last_forecast_date for u in uploads if u.last_forecast_date), default=None)
+    latest_upload = uploads[0].upload_date if uploads else None
 
     # 최근 업로드의 날짜 범위
     latest_forecast_dates = []
@@ -176,7 +134,10 @@ async def get_db_info(db: Session = Depends(get_history_db)):
                 "max": str(forecast_max_date) if forecast_max_date else None
             },
             "latest_upload_date": str(latest_upload) if latest_upload else None,
-            "latest_upload_forecast_dates": latest_forecast_dates
+            "latest_upload_forecast_dates": latest_forecast_dates,
+            "uploads": [
+                ForecastUploadInfo.model_validate(u).model_dump(mode="json") for u in uploads
+            ]
         },
         "actual": {
             "total_count": actual_count,
@@ -58,6 +58,33 @@ class Settings(BaseSettings):
     # Template Learning
     TEMPLATE_MIN_CONFIDENCE: float = 0.7
     TEMPLATE_AUTO_DISABLE_THRESHOLD: float = 0.7
+    TEMPLATE_METRICS_FLUSH_INTERVAL: float = 5.0  # 사용 기록/지표 write-behind 주기 (초, 0이면 즉시 기록)
+    TEMPLATE_METRICS_FLUSH_SIZE: int = 100  # 버퍼가 이 건수에 도달하면 주기 전이라도 기록
+
+    # Parse Cache (동일 파일 재업로드 시 파싱 결과 재사용)
+    PARSE_CACHE_ENABLED: bool = True
+    PARSE_CACHE_MAX_ENTRIES: int = 200
+    PARSE_CACHE_MAX_MB: float = 50.0
+
+    # Upload Jobs (백그라운드 업로드 작업 보관 기간)
+    UPLOAD_JOB_RETENTION_DAYS: int = 7
+
+    # Executor (블로킹 작업 실행 풀 크기)
+    EXECUTOR_IO_WORKERS: int = 8
+    EXECUTOR_CPU_WORKERS: int = 2  # 단가 파일 검증용 프로세스 수 (0이면 스레드 풀에서 실행)
+
+    # Price Master Reload (외부 변경 감지 주기, 초)
+    PRICE_RELOAD_ENABLED: bool = True
+    PRICE_RELOAD_INTERVAL: float = 5.0
+
+    # SQLite Storage Profile (연결마다 적용하는 PRAGMA)
+    SQLITE_JOURNAL_MODE: str = "WAL"  # WAL 이면 읽기와 쓰기가 서로 막지 않음
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_CACHE_SIZE_KB: int = 65536  # 연결당 페이지 캐시 크기
+    SQLITE_MMAP_SIZE_MB: int = 256  # 0이면 mmap 사용 안 함
+    SQLITE_TEMP_STORE: str = "MEMORY"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_MAINTENANCE_INTERVAL: float = 600.0  # wal_checkpoint/optimize 주기 (초, 0이면 비활성)
 
     # App Info
     APP_NAME: str = "Forecast Calculator"
@@ -1,7 +1,11 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.schema import CreateIndex
 from app.core.config import settings
+from app.core.migrations import (
+    run_migrations, retry_actual_record_key, HISTORY_MIGRATIONS, TEMPLATE_MIGRATIONS
+)
 
 # History DB (actual records, forecasts, summaries)
 HISTORY_DATABASE_URL = f"sqlite:///{settings.HISTORY_DB_PATH}"
@@ -16,6 +20,25 @@ TemplateSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=temp
 Base = declarative_base()
 
 
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """연결마다 SQLite 저장 프로필 적용 (Settings 의 SQLITE_* 값)"""
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA busy_timeout = {int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+        cursor.execute(f"PRAGMA journal_mode = {settings.SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous = {settings.SQLITE_SYNCHRONOUS}")
+        # 음수면 KB 단위
+        cursor.execute(f"PRAGMA cache_size = -{int(settings.SQLITE_CACHE_SIZE_KB)}")
+        cursor.execute(f"PRAGMA mmap_size = {int(settings.SQLITE_MMAP_SIZE_MB) * 1024 * 1024}")
+        cursor.execute(f"PRAGMA temp_store = {settings.SQLITE_TEMP_STORE}")
+    finally:
+        cursor.close()
+
+
+for _engine in (history_engine, template_engine):
+    event.listen(_engine, "connect", _apply_sqlite_pragmas)
+
+
 def get_history_db():
     db = HistorySessionLocal()
     try:
@@ -34,6 +57,42 @@ def get_template_db():
 
 def init_db():
     """Initialize all database tables"""
-    from app.models import actual_models, template_models
+    from app.models import actual_models, template_models, job_models, price_models
+    _drop_outdated_summary(history_engine)
     Base.metadata.create_all(bind=history_engine)
     Base.metadata.create_all(bind=template_engine)
+    retry_actual_record_key(history_engine)
+    run_migrations(history_engine, HISTORY_MIGRATIONS)
+    run_migrations(template_engine, TEMPLATE_MIGRATIONS)
+    _ensure_indexes(history_engine)
+
+
+def run_maintenance():
+    """WAL 체크포인트 및 통계 갱신 (주기 실행 / 종료 시)
+
+    WAL 파일이 계속 커지지 않도록 내용을 DB 파일에 반영해 비우고,
+    PRAGMA optimize 로 필요한 인덱스 통계만 다시 수집한다.
+    """
+    for name, engine in (("history", history_engine), ("templates", template_engine)):
+        with engine.connect() as conn:
+            if settings.SQLITE_JOURNAL_MODE.upper() == "WAL":
+                busy, log_pages, checkpointed = conn.execute(text("PRAGMA wal_checkpoint(TRUNCATE)")).one()
+                if busy:
+                    print(f"[WARN] {name}.db checkpoint incomplete ({checkpointed}/{log_pages} pages) - readers active")
+            conn.execute(text("PRAGMA optimize"))
+
+
+def _ensure_indexes(engine):
+    """모델에 선언된 인덱스 중 기존 테이블에 없는 것 생성 (create_all 은 새 테이블에만 생성)"""
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                conn.execute(CreateIndex(index, if_not_exists=True))
+
+
+def _drop_outdated_summary(engine):
+    """이전 스키마의 일간 요약 테이블 삭제 (원본에서 재생성 가능한 캐시)"""
+    with engine.begin() as conn:
+        columns = [row[1] for row in conn.execute(text("PRAGMA table_info(daily_summary)"))]
+        if columns and "actual_record_count" not in columns:
+            conn.execute(text("DROP TABLE daily_summary"))
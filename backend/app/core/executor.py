@@ -0,0 +1,68 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from functools import partial
+from typing import Any, Callable, Optional
+
+from app.core.config import settings
+
+
+class TaskExecutor:
+    """블로킹 작업 실행 계층
+
+    async 라우트에서 openpyxl/PIL/SQLAlchemy/Gemini 같은 동기 코드를 직접 호출하면
+    이벤트 루프가 멈춰 다른 요청(/health, 대시보드 등)까지 대기하게 된다.
+    - run_io: DB, LLM 호출 등 I/O 대기 작업 → 제한된 스레드 풀
+    - run_cpu: 입력이 작고 자체 완결적인 CPU 작업(현재는 단가 파일 검증) → 프로세스 풀
+      (EXECUTOR_CPU_WORKERS=0 이면 스레드 풀에서 실행)
+    프로세스 풀에 넘기는 함수와 인자는 pickle 가능해야 한다 (모듈 최상위 함수 사용).
+    업로드 분석은 공유 WorkbookContext 를 쓰므로 프로세스 풀로 넘기지 않는다.
+    """
+
+    def __init__(self):
+        self._io_pool: Optional[ThreadPoolExecutor] = None
+        self._cpu_pool: Optional[Executor] = None
+
+    @property
+    def io_pool(self) -> ThreadPoolExecutor:
+        if self._io_pool is None:
+            self._io_pool = ThreadPoolExecutor(
+                max_workers=settings.EXECUTOR_IO_WORKERS,
+                thread_name_prefix="io-worker"
+            )
+        return self._io_pool
+
+    @property
+    def cpu_pool(self) -> Executor:
+        if self._cpu_pool is None:
+            if settings.EXECUTOR_CPU_WORKERS > 0:
+                # fork는 스레드/DB 연결 상태를 복제하므로 모든 플랫폼에서 spawn 사용
+                self._cpu_pool = ProcessPoolExecutor(
+                    max_workers=settings.EXECUTOR_CPU_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                self._cpu_pool = self.io_pool
+        return self._cpu_pool
+
+    async def run_io(self, func: Callable, *args, **kwargs) -> Any:
+        """I/O 대기 작업을 스레드 풀에서 실행"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.io_pool, partial(func, *args, **kwargs))
+
+    async def run_cpu(self, func: Callable, *args, **kwargs) -> Any:
+        """CPU 작업을 프로세스 풀에서 실행"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.cpu_pool, partial(func, *args, **kwargs))
+
+    def shutdown(self):
+        """풀 종료 (앱 종료 시)"""
+        if self._cpu_pool is not None and self._cpu_pool is not self._io_pool:
+            self._cpu_pool.shutdown(wait=True, cancel_futures=True)
+        if self._io_pool is not None:
+            self._io_pool.shutdown(wait=True, cancel_futures=True)
+        self._cpu_pool = None
+        self._io_pool = None
+
+
+task_executor = TaskExecutor()
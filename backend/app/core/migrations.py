@@ -0,0 +1,185 @@
+from pathlib import Path
+from typing import Callable, List, Tuple
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+# (version, name, 적용 함수) - version 은 DB 별로 증가만 한다
+Migration = Tuple[int, str, Callable[[Connection], None]]
+
+
+def _drop_superseded_history_indexes(conn: Connection):
+    """복합/covering 인덱스로 대체된 단일 컬럼 인덱스 삭제 후 통계 수집"""
+    for name in (
+        "ix_actual_records_model",  # → ix_actual_records_model_process_date
+        "ix_actual_records_process",  # → ix_actual_records_process_date
+        "ix_forecast_snapshots_upload_date",  # → ix_forecast_snapshots_upload_cover
+        "ix_forecast_snapshots_forecast_date",  # → ix_forecast_snapshots_forecast_model_process
+    ):
+        conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+    conn.execute(text("ANALYZE"))
+
+
+def _backfill_forecast_uploads(conn: Connection):
+    """기존 forecast 스냅샷으로 업로드 카탈로그 채우기"""
+    conn.execute(text("""
+        INSERT OR IGNORE INTO forecast_uploads (
+            upload_date, row_count, first_forecast_date, last_forecast_date,
+            total_quantity, total_revenue, created_at, updated_at
+        )
+        SELECT upload_date, count(id), min(forecast_date), max(forecast_date),
+               coalesce(sum(quantity), 0), coalesce(sum(revenue), 0),
+               CURRENT_TIMESTAMP, CURRENT_TIMESTAMP
+        FROM forecast_snapshots
+        GROUP BY upload_date
+    """))
+
+
+def _refresh_forecast_uploads(conn: Connection):
+    """forecast_uploads 전체를 스냅샷에서 다시 계산 (snapshot_catalog_service.refresh 와 같은 집계)"""
+    conn.execute(text("""
+        DELETE FROM forecast_uploads
+        WHERE upload_date NOT IN (SELECT DISTINCT upload_date FROM forecast_snapshots)
+    """))
+    conn.execute(text("""
+        INSERT INTO forecast_uploads (
+            upload_date, row_count, first_forecast_date, last_forecast_date,
+            total_quantity, total_revenue, created_at, updated_at
+        )
+        SELECT upload_date, count(id), min(forecast_date), max(forecast_date),
+               coalesce(sum(quantity), 0), coalesce(sum(revenue), 0),
+               CURRENT_TIMESTAMP, CURRENT_TIMESTAMP
+        FROM forecast_snapshots
+        WHERE true
+        GROUP BY upload_date
+        ON CONFLICT (upload_date) DO UPDATE SET
+            row_count = excluded.row_count,
+            first_forecast_date = excluded.first_forecast_date,
+            last_forecast_date = excluded.last_forecast_date,
+            total_quantity = excluded.total_quantity,
+            total_revenue = excluded.total_revenue,
+            updated_at = CURRENT_TIMESTAMP
+    """))
+
+
+def _dedupe_forecast_snapshots(conn: Connection):
+    """Forecast upsert 유니크 키 이전에 생긴 중복 스냅샷 정리 후 유니크 인덱스 생성
+
+    같은 키는 가장 최근(id 최대) 행만 남기고, 행이 지워졌으면 업로드 카탈로그를 다시 계산한다.
+    """
+    deleted = conn.execute(text("""
+        DELETE FROM forecast_snapshots
+        WHERE id NOT IN (
+            SELECT MAX(id) FROM forecast_snapshots
+            GROUP BY upload_date, forecast_date, model, coalesce(process, '')
+        )
+    """)).rowcount
+    if deleted:
+        print(f"[INFO] Removed {deleted} duplicated forecast snapshot rows")
+        _refresh_forecast_uploads(conn)
+    conn.execute(text("""
+        CREATE UNIQUE INDEX IF NOT EXISTS ux_forecast_snapshots_key
+        ON forecast_snapshots (upload_date, forecast_date, model, coalesce(process, ''))
+    """))
+
+
+def _add_actual_record_key(conn: Connection):
+    """실적 (date, model, process) 유니크 인덱스 생성
+
+    실적은 원본 데이터라 중복 행을 지우지 않는다.
+    이전 버전에서 생긴 중복이 있으면 경고 후 같은 키의 일반 인덱스만 만들고,
+    중복 정리 후 재기동 시 retry_actual_record_key 가 유니크로 바꾼다.
+    """
+    exists = conn.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'ux_actual_records_key'"
+    )).first()
+    if exists:
+        return
+
+    duplicates = conn.execute(text("""
+        SELECT count(*) FROM (
+            SELECT 1 FROM actual_records
+            GROUP BY date, model, coalesce(process, '')
+            HAVING count(*) > 1
+        )
+    """)).scalar()
+    if duplicates:
+        print(f"[WARN] actual_records has {duplicates} duplicated (date, model, process) keys - unique index not created")
+        conn.execute(text("""
+            CREATE INDEX IF NOT EXISTS ix_actual_records_key
+            ON actual_records (date, model, coalesce(process, ''))
+        """))
+        return
+
+    conn.execute(text("DROP INDEX IF EXISTS ix_actual_records_key"))
+    conn.execute(text("""
+        CREATE UNIQUE INDEX ux_actual_records_key
+        ON actual_records (date, model, coalesce(process, ''))
+    """))
+
+
+def retry_actual_record_key(engine: Engine):
+    """중복 때문에 일반 인덱스로 대신한 실적 키만 유니크 인덱스로 다시 시도 (정상 DB 는 조회 1회)"""
+    with engine.begin() as conn:
+        fallback = conn.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'ix_actual_records_key'"
+        )).first()
+        if fallback:
+            _add_actual_record_key(conn)
+
+
+def _add_column(conn: Connection, table: str, column: str, ddl: str):
+    """컬럼이 없을 때만 추가 (create_all 로 새로 만든 테이블에는 이미 있음)"""
+    columns = {row[1] for row in conn.execute(text(f"PRAGMA table_info({table})"))}
+    if column not in columns:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+
+
+def _add_template_features(conn: Connection):
+    """템플릿 구조 특징 컬럼 추가 - 기존 템플릿은 원본 파일이 없어 정확 일치로만 매칭"""
+    _add_column(conn, "excel_templates", "features", "JSON")
+
+
+HISTORY_MIGRATIONS: List[Migration] = [
+    (1, "drop_superseded_history_indexes", _drop_superseded_history_indexes),
+    (2, "backfill_forecast_uploads", _backfill_forecast_uploads),
+    (3, "dedupe_forecast_snapshots", _dedupe_forecast_snapshots),
+    (4, "add_actual_record_key", _add_actual_record_key),
+]
+
+TEMPLATE_MIGRATIONS: List[Migration] = [
+    (1, "add_template_features", _add_template_features),
+]
+
+
+def run_migrations(engine: Engine, migrations: List[Migration]) -> int:
+    """
+    적용되지 않은 마이그레이션 실행 - 적용 건수 반환
+
+    create_all 이 선언된 테이블을 만든 뒤, _ensure_indexes 보다 먼저 실행되며
+    (기존 테이블의 중복 정리가 유니크 인덱스 생성보다 앞서야 함)
+    선언만으로 처리할 수 없는 변경(인덱스 삭제, 컬럼 추가, 데이터 변환)을 담당한다.
+    마이그레이션마다 한 트랜잭션으로 실행하고 schema_migrations 에 버전을 기록한다.
+    """
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        """))
+        applied = {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+    count = 0
+    for version, name, apply in sorted(migrations, key=lambda m: m[0]):
+        if version in applied:
+            continue
+        with engine.begin() as conn:
+            apply(conn)
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, name) VALUES (:version, :name)"),
+                {"version": version, "name": name}
+            )
+        print(f"[INFO] Applied migration {Path(engine.url.database).name} #{version} {name}")
+        count += 1
+    return count
@@ -1,2 +1,6 @@
-from app.models.actual_models import ActualRecord, ForecastSnapshot, DailySummary
-from app.models.template_models import ExcelTemplate, TemplateUsage, LearningMetrics
+from app.models.actual_models import (
+    ActualRecord, ForecastSnapshot, ForecastUpload, DailySummary, DailyModelSummary
+)
+from app.models.template_models import ExcelTemplate, TemplateUsage, LearningMetrics, ParseCache
+from app.models.job_models import UploadJob
+from app.models.price_models import PriceMaster, PriceHistory
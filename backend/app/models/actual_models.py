@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date, Float, DateTime, func
+from sqlalchemy import Column, Integer, String, Date, Float, DateTime, Index, func, literal_column
 from app.core.database import Base
 
 
@@ -8,22 +8,28 @@ class ActualRecord(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     date = Column(Date, nullable=False, index=True)
-    model = Column(String(50), nullable=False, index=True)
-    process = Column(String(20), nullable=True, index=True)
+    model = Column(String(50), nullable=False)
+    process = Column(String(20), nullable=True)
     quantity = Column(Integer, nullable=False)
     unit_price = Column(Float, nullable=False)
     revenue = Column(Float, nullable=False)
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
 
+    # 목록 조회 필터(모델/모델 접두어, 공정) + (date, id) 정렬용
+    __table_args__ = (
+        Index("ix_actual_records_model_process_date", "model", "process", "date"),
+        Index("ix_actual_records_process_date", "process", "date"),
+    )
+
 
 class ForecastSnapshot(Base):
     """Forecast 스냅샷 (차이 분석용)"""
     __tablename__ = "forecast_snapshots"
 
     id = Column(Integer, primary_key=True, index=True)
-    upload_date = Column(Date, nullable=False, index=True)
-    forecast_date = Column(Date, nullable=False, index=True)
+    upload_date = Column(Date, nullable=False)
+    forecast_date = Column(Date, nullable=False)
     model = Column(String(50), nullable=False, index=True)
     process = Column(String(20), nullable=True, index=True)
     quantity = Column(Integer, nullable=False)
@@ -31,13 +37,88 @@ class ForecastSnapshot(Base):
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
 
+    # 단가 재계산의 (forecast_date, model, process) 키 조회/조인
+    __table_args__ = (
+        Index("ix_forecast_snapshots_forecast_model_process", "forecast_date", "model", "process"),
+    )
+
+
+# Forecast 저장 upsert 키 (process 없음은 빈 문자열과 같은 키로 취급)
+Index(
+    "ux_forecast_snapshots_key",
+    ForecastSnapshot.upload_date,
+    ForecastSnapshot.forecast_date,
+    ForecastSnapshot.model,
+    func.coalesce(ForecastSnapshot.process, literal_column("''")),
+    unique=True
+)
+
+
+# 기간 상세/롤업 재계산용 covering 인덱스 - 롤업 GROUP BY 키(coalesce)와 상세 조회 컬럼을 모두 포함해
+# 테이블을 읽지 않고 정렬된 순서로 집계한다
+Index(
+    "ix_actual_records_date_cover",
+    ActualRecord.date,
+    ActualRecord.model,
+    func.coalesce(ActualRecord.process, literal_column("''")),
+    ActualRecord.process,
+    ActualRecord.quantity,
+    ActualRecord.revenue
+)
+Index(
+    "ix_forecast_snapshots_upload_cover",
+    ForecastSnapshot.upload_date,
+    ForecastSnapshot.forecast_date,
+    ForecastSnapshot.model,
+    func.coalesce(ForecastSnapshot.process, literal_column("''")),
+    ForecastSnapshot.process,
+    ForecastSnapshot.quantity,
+    ForecastSnapshot.revenue
+)
+
+
+class ForecastUpload(Base):
+    """Forecast 업로드 카탈로그 (업로드 날짜별 스냅샷 요약)
+
+    forecast 저장/단가 재계산과 같은 트랜잭션에서 snapshot_catalog_service 가 갱신한다.
+    """
+    __tablename__ = "forecast_uploads"
+
+    upload_date = Column(Date, primary_key=True)
+    row_count = Column(Integer, default=0)
+    first_forecast_date = Column(Date, nullable=True)
+    last_forecast_date = Column(Date, nullable=True)
+    total_quantity = Column(Integer, default=0)
+    total_revenue = Column(Float, default=0)
+    source_hash = Column(String(64), nullable=True)  # 업로드 원본 파일 SHA-256
+    created_at = Column(DateTime, default=func.now())
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
 
 class DailySummary(Base):
-    """일간 요약 캐시"""
+    """일간 요약 (실적/최신 forecast 일별 합계 롤업)
+
+    실적 입력/수정/삭제와 forecast 저장 시 summary_service 가 증분 갱신한다.
+    """
     __tablename__ = "daily_summary"
 
     date = Column(Date, primary_key=True)
     total_actual_qty = Column(Integer, default=0)
-    total_actual_revenue = Column(Integer, default=0)
+    total_actual_revenue = Column(Float, default=0)
+    actual_record_count = Column(Integer, default=0)
     total_forecast_qty = Column(Integer, default=0)
-    total_forecast_revenue = Column(Integer, default=0)
+    total_forecast_revenue = Column(Float, default=0)
+
+
+class DailyModelSummary(Base):
+    """모델/공정별 일간 요약 (process 없음은 빈 문자열)"""
+    __tablename__ = "daily_model_summary"
+
+    date = Column(Date, primary_key=True)
+    model = Column(String(50), primary_key=True)
+    process = Column(String(20), primary_key=True, default="")
+    actual_qty = Column(Integer, default=0)
+    actual_revenue = Column(Float, default=0)
+    actual_record_count = Column(Integer, default=0)
+    forecast_qty = Column(Integer, default=0)
+    forecast_revenue = Column(Float, default=0)
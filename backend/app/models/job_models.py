@@ -0,0 +1,19 @@
+from sqlalchemy import Column, String, Text, DateTime, JSON, func
+from app.core.database import Base
+
+
+class UploadJob(Base):
+    """Forecast 업로드 백그라운드 작업"""
+    __tablename__ = "upload_jobs"
+
+    id = Column(String(32), primary_key=True)
+    filename = Column(String(255))
+    file_hash = Column(String(64))
+    status = Column(String(20), nullable=False, default="pending", index=True)  # pending, running, completed, failed
+    stage = Column(String(20), nullable=True)  # 현재 진행 중인 단계
+    stage_timings = Column(JSON, default=dict)  # {"detect": ms, "parse": ms, ...}
+    result = Column(JSON, nullable=True)  # ForecastUploadResponse
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=func.now(), index=True)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+    finished_at = Column(DateTime, nullable=True)
@@ -0,0 +1,40 @@
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, UniqueConstraint, func
+from app.core.database import Base
+
+
+class PriceMaster(Base):
+    """단가 마스터 (모델+공정 복합키, process 없음은 빈 문자열)
+
+    모델 기본 단가는 먼저 등록된(id 가 작은) 단가이다.
+    """
+    __tablename__ = "price_master"
+
+    id = Column(Integer, primary_key=True, index=True)
+    model = Column(String(50), nullable=False)
+    process = Column(String(50), nullable=False, default="")
+    unit_price = Column(Float, nullable=False)
+    created_at = Column(DateTime, default=func.now())
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        UniqueConstraint("model", "process", name="uq_price_master_model_process"),
+    )
+
+
+class PriceHistory(Base):
+    """단가 이력 (유효 시작일 기준 버전)
+
+    (model, process) 의 date 시점 단가는 effective_from <= date 인 버전 중 가장 최근 버전이다.
+    """
+    __tablename__ = "price_history"
+
+    id = Column(Integer, primary_key=True, index=True)
+    model = Column(String(50), nullable=False)
+    process = Column(String(50), nullable=False, default="")
+    effective_from = Column(Date, nullable=False)
+    unit_price = Column(Float, nullable=False)
+    created_at = Column(DateTime, default=func.now())
+
+    __table_args__ = (
+        UniqueConstraint("model", "process", "effective_from", name="uq_price_history_version"),
+    )
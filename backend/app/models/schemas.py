@@ -21,6 +21,10 @@ class ActualRecordCreate(BaseModel):
     quantity: int
 
 
+class ActualBatchItem(ActualRecordCreate):
+    on_conflict: Optional[str] = None  # skip, overwrite, error (없으면 요청의 기본 정책)
+
+
 class ActualRecordResponse(ActualRecordBase):
     id: int
     created_at: datetime
@@ -46,6 +50,22 @@ class ForecastUploadResponse(BaseModel):
     notes: Optional[str] = None
     template_matched: bool = False
     template_name: Optional[str] = None
+    file_hash: Optional[str] = None  # 원본 파일 SHA-256 (저장 시 source_hash 로 전달)
+
+
+class UploadJobResponse(BaseModel):
+    id: str
+    filename: Optional[str] = None
+    status: str  # pending, running, completed, failed
+    stage: Optional[str] = None
+    stage_timings: Dict[str, int] = {}
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
 
 
 class ForecastSaveItem(BaseModel):
@@ -57,6 +77,20 @@ class ForecastSaveItem(BaseModel):
 
 class ForecastSaveRequest(BaseModel):
     items: List[ForecastSaveItem]
+    source_hash: Optional[str] = None  # 업로드 응답의 file_hash
+
+
+class ForecastUploadInfo(BaseModel):
+    upload_date: date
+    row_count: int
+    first_forecast_date: Optional[date] = None
+    last_forecast_date: Optional[date] = None
+    total_quantity: int
+    total_revenue: float
+    source_hash: Optional[str] = None
+
+    class Config:
+        from_attributes = True
 
 
 class ForecastSaveResponse(BaseModel):
@@ -98,11 +132,22 @@ class RevenueSummary(BaseModel):
     achievement_rate: float
 
 
+class RevenueGroup(BaseModel):
+    key: str  # day: 2025-01-31, week: 2025-W05, month: 2025-01, model/process: 이름
+    actual_quantity: int = 0
+    actual_revenue: float = 0
+    forecast_quantity: int = 0
+    forecast_revenue: float = 0
+    total_revenue: float = 0
+
+
 class RevenueReportResponse(BaseModel):
     items: List[RevenueItem]
     summary: RevenueSummary
     period_start: date
     period_end: date
+    group_by: Optional[str] = None  # day, week, month, model, process
+    groups: List[RevenueGroup] = []
 
 
 # =============== Template ===============
@@ -10,6 +10,7 @@ class ExcelTemplate(Base):
     name = Column(String(100), nullable=False)
     fingerprint = Column(String(64), unique=True, index=True)
     mapping = Column(JSON, nullable=False)
+    features = Column(JSON, nullable=True)  # 구조 특징 (템플릿 인덱스용, fingerprint_service.analyze)
     accuracy_rate = Column(Float, default=1.0)
     use_count = Column(Integer, default=0)
     is_active = Column(Boolean, default=True)
@@ -38,3 +39,16 @@ class LearningMetrics(Base):
     template_hits = Column(Integer, default=0)
     llm_calls = Column(Integer, default=0)
     api_cost_saved = Column(Float, default=0.0)
+
+
+class ParseCache(Base):
+    """업로드 파싱 결과 캐시 (파일 내용 해시 + 파서/템플릿 버전 기준)"""
+    __tablename__ = "parse_cache"
+
+    cache_key = Column(String(64), primary_key=True)
+    file_hash = Column(String(64), index=True)
+    response = Column(JSON, nullable=False)
+    size_bytes = Column(Integer, default=0)
+    hit_count = Column(Integer, default=0)
+    created_at = Column(DateTime, default=func.now())
+    last_accessed_at = Column(DateTime, default=func.now(), index=True)
@@ -0,0 +1,163 @@
+from datetime import date
+from typing import Dict, List, Tuple
+from sqlalchemy import bindparam, func, insert, text, update
+from sqlalchemy.orm import Session
+
+from app.models.actual_models import ActualRecord
+from app.models.schemas import ActualBatchItem
+from app.services.price_service import price_service
+from app.services.summary_service import summary_service
+
+# 중복 키 처리 정책
+CONFLICT_POLICIES = ("skip", "overwrite", "error")
+
+# executemany 1회당 행 수
+BATCH_CHUNK_SIZE = 1000
+
+# (date, model, process) - process 없음은 빈 문자열로 정규화 (유니크 인덱스와 동일)
+ActualKey = Tuple[date, str, str]
+
+
+class ActualService:
+    """실적 일괄 입력
+
+    행마다 ORM 객체를 만들거나 중복을 조회하지 않고
+    1) 요청 안의 같은 키는 마지막 항목만 사용
+    2) 요청 키를 임시 테이블에 올려 기존 실적과 한 번에 조인 (ux_actual_records_key)
+    3) 새 행은 Core insert, 덮어쓸 행은 Core update 를 청크 단위 executemany 로 실행한다.
+    기존 키와 겹치는 행은 항목별 on_conflict (없으면 요청 기본값) 정책을 따른다.
+    """
+
+    def create_batch(
+        self,
+        db: Session,
+        records: List[ActualBatchItem],
+        on_conflict: str = "error"
+    ) -> Dict:
+        """실적 일괄 입력 (생성/덮어쓰기/스킵/오류 건수 반환)"""
+        errors = []
+
+        # 실적 날짜 시점 단가로 매출 일괄 계산 (모델 기본 단가)
+        result = price_service.calculate_revenues(
+            [req.model for req in records],
+            None,
+            [req.quantity for req in records],
+            [req.date for req in records]
+        )
+
+        # 같은 키가 여러 번 오면 마지막 항목 사용
+        rows: Dict[ActualKey, dict] = {}
+        for req, unit_price, revenue, missing in zip(
+            records, result["unit_prices"].tolist(), result["revenues"].tolist(), result["missing"].tolist()
+        ):
+            if missing:
+                errors.append({"model": req.model, "error": "단가 정보 없음"})
+                continue
+            rows[(req.date, req.model, req.process or "")] = {
+                "date": req.date,
+                "model": req.model,
+                "process": req.process,
+                "quantity": req.quantity,
+                "unit_price": unit_price,
+                "revenue": revenue,
+                "on_conflict": req.on_conflict or on_conflict
+            }
+        skipped_count = len(records) - len(errors) - len(rows)
+
+        existing = self._existing_records(db, list(rows))
+
+        inserts, updates, changes = [], [], []
+        for key, row in rows.items():
+            policy = row.pop("on_conflict")
+            current = existing.get(key)
+            if current is None:
+                inserts.append(row)
+            elif policy == "skip":
+                skipped_count += 1
+                continue
+            elif policy == "error":
+                errors.append({
+                    "model": row["model"],
+                    "error": f"해당 날짜({row['date']})에 공정 '{row['process']}'의 기록이 이미 있습니다"
+                })
+                continue
+            else:
+                record_id, quantity, revenue = current
+                updates.append({
+                    "b_id": record_id,
+                    "b_process": row["process"],
+                    "b_quantity": row["quantity"],
+                    "b_unit_price": row["unit_price"],
+                    "b_revenue": row["revenue"]
+                })
+                changes.append((key[0], key[1], key[2], -quantity, -revenue, -1))
+            changes.append((key[0], key[1], key[2], row["quantity"], row["revenue"], 1))
+
+        # ORM bulk insert/update 를 거치지 않고 Core executemany 로 실행
+        connection = db.connection()
+        for start in range(0, len(inserts), BATCH_CHUNK_SIZE):
+            connection.execute(insert(ActualRecord), inserts[start:start + BATCH_CHUNK_SIZE])
+
+        update_stmt = (
+            update(ActualRecord)
+            .where(ActualRecord.id == bindparam("b_id"))
+            .values(
+                process=bindparam("b_process"),
+                quantity=bindparam("b_quantity"),
+                unit_price=bindparam("b_unit_price"),
+                revenue=bindparam("b_revenue"),
+                updated_at=func.now()
+            )
+        )
+        for start in range(0, len(updates), BATCH_CHUNK_SIZE):
+            connection.execute(update_stmt, updates[start:start + BATCH_CHUNK_SIZE])
+
+        summary_service.apply_actual_changes(db, changes)
+        db.commit()
+
+        return {
+            "success": True,
+            "created_count": len(inserts),
+            "updated_count": len(updates),
+            "skipped_count": skipped_count,
+            "error_count": len(errors),
+            "errors": errors
+        }
+
+    def _existing_records(self, db: Session, keys: List[ActualKey]) -> Dict[ActualKey, Tuple[int, int, float]]:
+        """요청 키와 겹치는 기존 실적 (key → (id, quantity, revenue))"""
+        if not keys:
+            return {}
+
+        db.execute(text("DROP TABLE IF EXISTS tmp_actual_keys"))
+        db.execute(text("""
+            CREATE TEMP TABLE tmp_actual_keys (
+                date TEXT NOT NULL,
+                model TEXT NOT NULL,
+                process TEXT NOT NULL,
+                PRIMARY KEY (date, model, process)
+            )
+        """))
+        insert_sql = text("INSERT INTO tmp_actual_keys (date, model, process) VALUES (:date, :model, :process)")
+        params = [{"date": day.isoformat(), "model": model, "process": process} for day, model, process in keys]
+        for start in range(0, len(params), BATCH_CHUNK_SIZE):
+            db.execute(insert_sql, params[start:start + BATCH_CHUNK_SIZE])
+
+        # 같은 키의 기존 행이 여러 개면 (유니크 인덱스 이전 데이터) 가장 최근 행 기준
+        # 임시 테이블은 통계가 없어 JOIN 이면 실적 전체를 훑는 순서를 고르므로 CROSS JOIN 으로 키 테이블부터 읽게 고정
+        rows = db.execute(text("""
+            SELECT a.id, a.date, a.model, coalesce(a.process, ''), a.quantity, a.revenue
+            FROM tmp_actual_keys k
+            CROSS JOIN actual_records a
+              ON a.date = k.date AND a.model = k.model AND coalesce(a.process, '') = k.process
+            ORDER BY a.id
+        """)).all()
+        db.execute(text("DROP TABLE tmp_actual_keys"))
+
+        return {
+            (date.fromisoformat(day), model, process): (record_id, quantity, revenue)
+            for record_id, day, model, process, quantity, revenue in rows
+        }
+
+
+actual_service = ActualService()
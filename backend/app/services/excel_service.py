@@ -2,25 +2,34 @@ import pandas as pd
 import openpyxl
 from openpyxl.drawing.image import Image
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Iterator, Optional, Tuple
+from itertools import chain, islice
 from PIL import Image as PILImage
 import tempfile
 import io
 import re
 from datetime import datetime, timedelta
 
+from app.services.keyword_matcher import header_keyword_matcher
+from app.services.workbook_context import WorkbookContext, WorkbookSource
+from app.services.forecast_grid import forecast_grid_engine
+
 
 class ExcelService:
     """Excel 파일 처리 서비스"""
 
+    # 파싱 결과가 달라지는 변경 시 올려서 파싱 캐시를 무효화
+    PARSER_VERSION = "3"
+
     def read_excel(self, file_path: str) -> pd.DataFrame:
         """Excel 파일 읽기"""
         return pd.read_excel(file_path)
 
-    def get_sheet_info(self, file_path: str) -> Dict[str, Any]:
+    def get_sheet_info(self, source: WorkbookSource) -> Dict[str, Any]:
         """Excel 시트 정보 가져오기"""
-        wb = openpyxl.load_workbook(file_path, data_only=True)
-        sheet = wb.active
+        ctx = WorkbookContext.of(source)
+        wb = ctx.workbook
+        sheet = ctx.sheet
 
         return {
             "max_row": sheet.max_row,
@@ -29,21 +38,17 @@ class ExcelService:
             "sheet_names": wb.sheetnames
         }
 
-    def excel_to_image(self, file_path: str, output_path: Optional[str] = None) -> str:
+    def excel_to_image(self, source: WorkbookSource, output_path: Optional[str] = None) -> str:
         """Excel 시트를 이미지로 변환 (스크린샷 시뮬레이션)"""
         # 실제 구현에서는 xlsx2img 또는 win32com 사용
         # 여기서는 간단한 텍스트 기반 이미지 생성
-        wb = openpyxl.load_workbook(file_path, data_only=True)
-        sheet = wb.active
 
-        # 데이터 읽기
+        # 데이터 읽기 (상위 50행 x 20열만 사용하므로 순차 읽기)
         data = []
-        for row in sheet.iter_rows(min_row=1, max_row=min(sheet.max_row, 50),
-                                    min_col=1, max_col=min(sheet.max_column, 20)):
+        for values in WorkbookContext.of(source).iter_values(max_row=50):
             row_data = []
-            for cell in row:
-                value = cell.value if cell.value is not None else ""
-                row_data.append(str(value))
+            for value in values[:20]:
+                row_data.append(str(value if value is not None else ""))
             data.append(row_data)
 
         # PIL로 이미지 생성
@@ -79,10 +84,9 @@ class ExcelService:
         img.save(output_path)
         return output_path
 
-    def extract_headers(self, file_path: str, header_rows: int = 3) -> List[List[str]]:
+    def extract_headers(self, source: WorkbookSource, header_rows: int = 3) -> List[List[str]]:
         """헤더 행 추출"""
-        wb = openpyxl.load_workbook(file_path, data_only=True)
-        sheet = wb.active
+        sheet = WorkbookContext.of(source).sheet
 
         headers = []
         for row_num in range(1, header_rows + 1):
@@ -115,12 +119,11 @@ class ExcelService:
 
     def parse_with_mapping(
         self,
-        file_path: str,
+        source: WorkbookSource,
         mapping: Dict[str, Any]
     ) -> List[Dict[str, Any]]:
         """매핑 정보를 사용하여 Excel 데이터 파싱"""
-        wb = openpyxl.load_workbook(file_path, data_only=True)
-        sheet = wb.active
+        sheet = WorkbookContext.of(source).sheet
 
         model_col = mapping.get("model_column", "A")
         model_start_row = mapping.get("model_start_row", 3)
@@ -161,36 +164,47 @@ class ExcelService:
 
         return results
 
-    def parse_cnc_forecast(self, file_path: str) -> Dict[str, Any]:
-        """
-        CNC Forecast Excel 파일 파싱 (고정 형식)
+    # CNC Forecast 헤더 탐색에 필요한 선두 행 수
+    # ("Forecast CNC" 섹션 30행 + "Model" 헤더 10행 + 날짜 행 3행)
+    CNC_HEADER_SCAN_ROWS = 45
+    # 벡터화 추출 시 한 번에 배열로 올리는 데이터 행 수
+    CNC_BLOCK_ROWS = 2000
 
-        실제 형식 (스크린샷 기반):
-        - Row 3: 첫 번째 "⊙ Forecast CNC" (요약 섹션)
-        - Row 11: 두 번째 "⊙ Forecast CNC" (실제 데이터 섹션 시작)
-        - Row 12: "Model"(F열), "Process"(G열), "Vendor"(H열) 헤더
-        - Row 13: 날짜들 (I열부터: 11/17, 11/18, ...)
-        - Row 14+: 실제 데이터 (M1, M3, B7 Main mmW 등)
+    def _locate_cnc_layout(self, head: List[tuple]) -> Dict[str, Any]:
+        """
+        선두 행(값 튜플 목록)에서 CNC Forecast 레이아웃 탐색
 
-        주의: A-E열은 숨겨진 열일 수 있음. Model은 F열(6)에 있음
+        Returns:
+            model_col, process_col, date_row, date_columns({col_idx: date_str})
         """
-        wb = openpyxl.load_workbook(file_path, data_only=True)
-        sheet = wb.active
+        max_row = len(head)
+        max_col = max((len(values) for values in head), default=0)
+
+        def cell(row: int, col: int):
+            if row < 1 or row > max_row:
+                return None
+            values = head[row - 1]
+            return values[col - 1] if col <= len(values) else None
 
-        print(f"[DEBUG] Parsing CNC Forecast: max_row={sheet.max_row}, max_col={sheet.max_column}")
+        # 헤더 탐색 영역(19열) 셀마다 키워드를 한 번만 검사해 두고 단계별로 재사용
+        keyword_grid = [
+            [header_keyword_matcher.find_value(value) for value in values[:19]]
+            for values in head
+        ]
+
+        def keywords(row: int, col: int):
+            row_keywords = keyword_grid[row - 1]
+            return row_keywords[col - 1] if col <= len(row_keywords) else frozenset()
 
         # 1. 데이터 섹션 시작 찾기 - 두 번째 "Forecast CNC" 찾기
         forecast_rows = []
 
-        for row in range(1, min(30, sheet.max_row + 1)):
-            for col in range(1, min(20, sheet.max_column + 1)):
-                cell_val = sheet.cell(row=row, column=col).value
-                if cell_val:
-                    cell_str = str(cell_val).lower().strip()
-                    if 'forecast' in cell_str and 'cnc' in cell_str:
-                        forecast_rows.append(row)
-                        print(f"[DEBUG] Found 'Forecast CNC' at row {row}, col {col}")
-                        break
+        for row in range(1, min(30, max_row + 1)):
+            for col in range(1, min(20, max_col + 1)):
+                if {'forecast', 'cnc'} <= keywords(row, col):
+                    forecast_rows.append(row)
+                    print(f"[DEBUG] Found 'Forecast CNC' at row {row}, col {col}")
+                    break
 
         # 두 번째 "Forecast CNC" 섹션 사용
         data_section_start = 1
@@ -207,20 +221,19 @@ class ExcelService:
 
         # 디버그: data_section 이후 행들의 내용 출력
         print(f"[DEBUG] Searching for 'Model' header from row {data_section_start}")
-        for row in range(data_section_start, min(data_section_start + 5, sheet.max_row + 1)):
+        for row in range(data_section_start, min(data_section_start + 5, max_row + 1)):
             row_vals = []
-            for col in range(1, min(15, sheet.max_column + 1)):
-                val = sheet.cell(row=row, column=col).value
+            for col in range(1, min(15, max_col + 1)):
+                val = cell(row, col)
                 row_vals.append(f"{col}:{str(val)[:15]}" if val else "")
             print(f"[DEBUG] Row {row}: {[v for v in row_vals if v]}")
 
-        for row in range(data_section_start, min(data_section_start + 10, sheet.max_row + 1)):
-            for col in range(1, min(20, sheet.max_column + 1)):
-                cell_val = sheet.cell(row=row, column=col).value
-                if cell_val and 'model' in str(cell_val).lower():
+        for row in range(data_section_start, min(data_section_start + 10, max_row + 1)):
+            for col in range(1, min(20, max_col + 1)):
+                if 'model' in keywords(row, col):
                     model_header_row = row
                     model_col = col
-                    print(f"[DEBUG] Found 'Model' header at row {row}, col {col}: '{cell_val}'")
+                    print(f"[DEBUG] Found 'Model' header at row {row}, col {col}: '{cell(row, col)}'")
                     break
             if model_header_row > 0:
                 break
@@ -241,10 +254,10 @@ class ExcelService:
         date_row = model_header_row + 1
 
         # 날짜 행 후보들 검색 (Model 헤더 이후 3개 행까지)
-        for check_row in range(model_header_row + 1, min(model_header_row + 4, sheet.max_row + 1)):
+        for check_row in range(model_header_row + 1, min(model_header_row + 4, max_row + 1)):
             found_dates = 0
-            for col in range(data_start_col, sheet.max_column + 1):
-                cell_val = sheet.cell(row=check_row, column=col).value
+            for col in range(data_start_col, len(head[check_row - 1]) + 1):
+                cell_val = cell(check_row, col)
                 if cell_val:
                     # datetime 객체인 경우
                     if isinstance(cell_val, datetime):
@@ -261,14 +274,13 @@ class ExcelService:
                 break
 
         # 날짜 컬럼 매핑 (찾은 날짜 행에서)
-        for col in range(data_start_col, sheet.max_column + 1):
-            cell_val = sheet.cell(row=date_row, column=col).value
+        date_values = head[date_row - 1] if date_row <= max_row else ()
+        for col in range(data_start_col, len(date_values) + 1):
+            cell_val = cell(date_row, col)
             if cell_val:
                 # datetime 객체인 경우 직접 변환
                 if isinstance(cell_val, datetime):
-                    date_str = cell_val.strftime("%Y-%m-%d")
-                    date_columns[col] = date_str
-                    print(f"[DEBUG] Col {col}: datetime -> {date_str}")
+                    date_columns[col] = cell_val.strftime("%Y-%m-%d")
                 else:
                     # 문자열인 경우 MM/DD 패턴 체크
                     cell_str = str(cell_val).strip()
@@ -277,59 +289,66 @@ class ExcelService:
                         month = int(match.group(1))
                         day = int(match.group(2))
                         year = current_year if month >= datetime.now().month - 1 else current_year + 1
-                        date_str = f"{year}-{month:02d}-{day:02d}"
-                        date_columns[col] = date_str
+                        date_columns[col] = f"{year}-{month:02d}-{day:02d}"
 
         print(f"[DEBUG] Found {len(date_columns)} date columns from row {date_row}")
 
-        # 4. 데이터 시작 행 찾기 - 날짜 행 다음 행부터
-        data_start_row = date_row + 1
-        skip_keywords = ['total', '합계', 'sum', 'ag tech', 'agtech']
-
-        # 5. 데이터 파싱
-        results = []
-        current_model = None
-
-        for row_num in range(data_start_row, sheet.max_row + 1):
-            # 모델명 (병합셀 처리 - 비어있으면 이전 값 유지)
-            model_cell = sheet.cell(row=row_num, column=model_col).value
-            if model_cell:
-                model_str = str(model_cell).strip()
-                if not any(kw in model_str.lower() for kw in skip_keywords):
-                    current_model = model_str
+        return {
+            "model_col": model_col,
+            "process_col": process_col,
+            "date_row": date_row,
+            "date_columns": date_columns,
+        }
 
-            if not current_model:
-                continue
+    def iter_cnc_forecast(self, source: WorkbookSource) -> Iterator[Dict[str, Any]]:
+        """
+        CNC Forecast 스트리밍 파싱 (forecast 항목을 하나씩 yield)
 
-            # 공정 (Process)
-            process_cell = sheet.cell(row=row_num, column=process_col).value
-            process = str(process_cell).strip() if process_cell else ""
+        워크북이 아직 로드되지 않았다면 read_only 모드로 행 값을 순차 읽기 하므로
+        시트 크기와 무관하게 메모리 사용량이 일정하다.
+        선두 CNC_HEADER_SCAN_ROWS 행만 버퍼링하여 섹션/Model 헤더/날짜 행을 찾은 뒤
+        나머지 행은 한 번의 순방향 패스로 CNC_BLOCK_ROWS 행씩 벡터화 추출한다.
+        """
+        rows = WorkbookContext.of(source).iter_values()
+        try:
+            head = list(islice(rows, self.CNC_HEADER_SCAN_ROWS))
+            layout = self._locate_cnc_layout(head)
+
+            model_idx = layout["model_col"] - 1
+            process_idx = layout["process_col"] - 1
+            date_row = layout["date_row"]
+            date_items = [(col - 1, date_str) for col, date_str in layout["date_columns"].items()]
+
+            # 4. 데이터 시작 행 - 날짜 행 다음 행부터
+            data_rows = islice(chain(head, rows), date_row, None)
+
+            # 5. 데이터 파싱 - 행 블록 단위로 벡터화 추출 (모델명은 블록 간 이어받기)
+            current_model = None
+            while True:
+                block = list(islice(data_rows, self.CNC_BLOCK_ROWS))
+                if not block:
+                    break
+                items, current_model = forecast_grid_engine.extract(
+                    block, model_idx, process_idx, date_items, carry_model=current_model
+                )
+                yield from items
+        finally:
+            rows.close()
+
+    def parse_cnc_forecast(self, source: WorkbookSource) -> Dict[str, Any]:
+        """
+        CNC Forecast Excel 파일 파싱 (고정 형식)
 
-            # 빈 행 스킵
-            if not process:
-                continue
+        실제 형식 (스크린샷 기반):
+        - Row 3: 첫 번째 "⊙ Forecast CNC" (요약 섹션)
+        - Row 11: 두 번째 "⊙ Forecast CNC" (실제 데이터 섹션 시작)
+        - Row 12: "Model"(F열), "Process"(G열), "Vendor"(H열) 헤더
+        - Row 13: 날짜들 (I열부터: 11/17, 11/18, ...)
+        - Row 14+: 실제 데이터 (M1, M3, B7 Main mmW 등)
 
-            # 각 날짜 컬럼의 수량 추출
-            for col_idx, date_str in date_columns.items():
-                quantity_cell = sheet.cell(row=row_num, column=col_idx).value
-
-                if quantity_cell is not None:
-                    try:
-                        if isinstance(quantity_cell, str):
-                            quantity_cell = quantity_cell.replace(',', '').strip()
-                            if quantity_cell == '-' or quantity_cell == '':
-                                continue
-                        quantity = int(float(quantity_cell))
-
-                        if quantity > 0:
-                            results.append({
-                                "model": current_model,
-                                "process": process,
-                                "period": date_str,
-                                "quantity": quantity
-                            })
-                    except (ValueError, TypeError):
-                        continue
+        주의: A-E열은 숨겨진 열일 수 있음. Model은 F열(6)에 있음
+        """
+        results = list(self.iter_cnc_forecast(source))
 
         print(f"[DEBUG] Parsed {len(results)} data items")
 
@@ -372,38 +391,34 @@ class ExcelService:
 
         return target_date.strftime("%Y-%m-%d")
 
-    def is_cnc_forecast_format(self, file_path: str) -> bool:
+    def is_cnc_forecast_format(self, source: WorkbookSource) -> bool:
         """
         CNC Forecast 형식인지 확인
         """
         try:
-            wb = openpyxl.load_workbook(file_path, data_only=True)
-            sheet = wb.active
+            # 처음 5행만 필요하므로 워크북 전체를 로드하지 않고 순차 읽기
+            head = list(WorkbookContext.of(source).iter_values(max_row=5))
 
             # 디버그: 첫 3행 내용 출력
-            print(f"[DEBUG] Sheet: {sheet.title}, max_row={sheet.max_row}, max_col={sheet.max_column}")
-            for row in range(1, min(4, sheet.max_row + 1)):
-                row_vals = []
-                for col in range(1, min(15, sheet.max_column + 1)):
-                    val = sheet.cell(row=row, column=col).value
-                    row_vals.append(str(val)[:20] if val else "")
+            for row, values in enumerate(head[:3], start=1):
+                row_vals = [str(val)[:20] if val else "" for val in values[:14]]
                 print(f"[DEBUG] Row {row}: {row_vals}")
 
             # 체크 1: 처음 5행 내에서 "Forecast" 또는 "CNC" 키워드 찾기
             found_forecast = False
             found_week = False
 
-            for row in range(1, min(6, sheet.max_row + 1)):
-                for col in range(1, min(20, sheet.max_column + 1)):
-                    cell_val = sheet.cell(row=row, column=col).value
-                    if cell_val:
-                        cell_str = str(cell_val).lower()
-                        if 'forecast' in cell_str or 'cnc' in cell_str:
-                            found_forecast = True
-                            print(f"[DEBUG] Found 'forecast/cnc' at row={row}, col={col}: {cell_val}")
-                        if 'week' in cell_str:
-                            found_week = True
-                            print(f"[DEBUG] Found 'week' at row={row}, col={col}: {cell_val}")
+            for row, values in enumerate(head, start=1):
+                for col, cell_val in enumerate(values[:19], start=1):
+                    cell_keywords = header_keyword_matcher.find_value(cell_val)
+                    if not cell_keywords:
+                        continue
+                    if 'forecast' in cell_keywords or 'cnc' in cell_keywords:
+                        found_forecast = True
+                        print(f"[DEBUG] Found 'forecast/cnc' at row={row}, col={col}: {cell_val}")
+                    if 'week' in cell_keywords:
+                        found_week = True
+                        print(f"[DEBUG] Found 'week' at row={row}, col={col}: {cell_val}")
 
             result = found_forecast and found_week
             print(f"[DEBUG] is_cnc_forecast_format result: {result} (forecast={found_forecast}, week={found_week})")
@@ -414,3 +429,4 @@ class ExcelService:
 
 
 excel_service = ExcelService()
+
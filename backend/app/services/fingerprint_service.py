@@ -1,28 +1,116 @@
 import hashlib
 import json
 import re
-from typing import Dict, List, Any
-import openpyxl
-from pathlib import Path
+from typing import Dict, List, Any, Tuple
+import jellyfish
+import numpy as np
+
+from app.services.keyword_matcher import header_keyword_matcher
+from app.services.workbook_context import WorkbookContext, WorkbookSource
+
+
+# 키워드 탐색 대상 (소문자, header_keyword_matcher 키워드 중 일부)
+FINGERPRINT_KEYWORDS = frozenset([
+    '모델', 'model', '품목', '제품',
+    '주차', 'week', '일', 'day', '날짜', 'date',
+    '수량', 'qty', 'quantity', '생산',
+    '합계', 'total', 'sum'
+])
+
+# 핑거프린트에 쓰는 좌상단 영역 (헤더 1-3행, 키워드 1-5행, 데이터 타입 4-10행, 최대 10열)
+WINDOW_ROWS = 10
+WINDOW_COLS = 10
+HEADER_ROWS = 3
+KEYWORD_ROWS = 5
+
+_NUMERIC = re.compile(r'^[\d.,]+$')
+_DIGITS = re.compile(r'\d+(?:[.,]\d+)*')
 
 
 class FingerprintService:
-    """Excel 파일 핑거프린트 생성 서비스"""
+    """Excel 파일 핑거프린트 생성 서비스
+
+    핑거프린트 구성 요소와 구조 특징은 시트 좌상단 WINDOW_ROWS x WINDOW_COLS 영역을
+    한 번 읽어 같은 루프에서 모두 계산한다 (WorkbookContext.read_window).
+    """
 
-    def generate_fingerprint(self, file_path: str) -> str:
+    def generate_fingerprint(self, source: WorkbookSource) -> str:
         """Excel 파일의 핑거프린트 생성"""
-        wb = openpyxl.load_workbook(file_path, data_only=True)
-        sheet = wb.active
+        return self.analyze(source)[0]
+
+    def analyze(self, source: WorkbookSource) -> Tuple[str, Dict[str, Any]]:
+        """핑거프린트와 구조 특징을 한 번에 계산
+
+        특징은 템플릿 인덱스(MinHash-LSH) 용으로 템플릿과 함께 저장한다.
+        - dimensions: [행 수, 열 수]
+        - header_tokens: 상위 3행 x 10열 정규화 헤더 텍스트
+        - type_grid: 4-10행 셀 타입 (행별 문자열)
+        - keywords: 주요 키워드
+        """
+        components, features = self._scan(source)
+        return self._hash_components(components), features
+
+    def _scan(self, source: WorkbookSource) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """좌상단 영역을 한 번 훑어 (핑거프린트 구성 요소, 구조 특징) 계산"""
+        window = WorkbookContext.of(source).read_window(WINDOW_ROWS, WINDOW_COLS)
+        max_row, max_col = window["max_row"], window["max_column"]
+
+        header_pattern, header_tokens, header_texts = [], [], []
+        type_grid = []
+        keywords = set()
+
+        for row_num, row in enumerate(window["rows"], start=1):
+            if row_num <= HEADER_ROWS:
+                row_pattern, row_tokens = [], []
+            else:
+                row_types = []
+
+            for value in row:
+                text = str(value) if value is not None else ''
+
+                if row_num <= HEADER_ROWS:
+                    if value:
+                        # 정규화: 숫자는 '#', 텍스트는 앞 3글자
+                        row_pattern.append('#' if _NUMERIC.match(text) else text[:3])
+                        header_texts.append(text)
+                    else:
+                        row_pattern.append('')
+                    row_tokens.append(_DIGITS.sub('#', ' '.join(text.split()).lower()))
+                elif value is None:
+                    row_types.append('E')  # Empty
+                elif isinstance(value, (int, float)):
+                    row_types.append('N')  # Number
+                else:
+                    row_types.append('T')  # Text
+
+                if row_num <= KEYWORD_ROWS:
+                    keywords.update(header_keyword_matcher.find_value(value) & FINGERPRINT_KEYWORDS)
+
+            if row_num <= HEADER_ROWS:
+                header_pattern.append('|'.join(row_pattern))
+                header_tokens.append(row_tokens)
+            else:
+                type_grid.append(''.join(row_types))
 
         components = {
-            "row_count_range": self._get_range_bucket(sheet.max_row),
-            "col_count_range": self._get_range_bucket(sheet.max_column),
-            "header_pattern": self._extract_header_pattern(sheet),
-            "data_type_pattern": self._extract_data_types(sheet),
-            "merged_cells_count": len(list(sheet.merged_cells.ranges)),
-            "keywords": self._extract_keywords(sheet),
+            "row_count_range": self._get_range_bucket(max_row),
+            "col_count_range": self._get_range_bucket(max_col),
+            "header_pattern": header_pattern,
+            "data_type_pattern": ','.join(type_grid),
+            "merged_cells_count": window["merged_cells_count"],
+            "keywords": sorted(keywords),
         }
+        features = {
+            "dimensions": [max_row, max_col],
+            "header_tokens": header_tokens,
+            "header_text": ' '.join(header_texts),
+            "type_grid": type_grid,
+            "keywords": sorted(keywords),
+        }
+        return components, features
 
+    def _hash_components(self, components: Dict[str, Any]) -> str:
+        """구성 요소 해시 (16자)"""
         return hashlib.sha256(
             json.dumps(components, sort_keys=True).encode()
         ).hexdigest()[:16]
@@ -38,123 +126,45 @@ class FingerprintService:
         else:
             return "xlarge"
 
-    def _extract_header_pattern(self, sheet) -> List[str]:
-        """상위 3행의 헤더 패턴 추출"""
-        patterns = []
-        for row_num in range(1, min(4, sheet.max_row + 1)):
-            row_pattern = []
-            for cell in sheet[row_num]:
-                if cell.value:
-                    # 정규화: 숫자는 '#', 텍스트는 첫 글자만
-                    value = str(cell.value)
-                    if re.match(r'^[\d.,]+$', value):
-                        row_pattern.append('#')
-                    else:
-                        row_pattern.append(value[:3])
-                else:
-                    row_pattern.append('')
-            patterns.append('|'.join(row_pattern[:10]))  # 최대 10열
-        return patterns
-
-    def _extract_data_types(self, sheet) -> str:
-        """데이터 타입 패턴 추출 (4-10행)"""
-        type_grid = []
-        for row_num in range(4, min(11, sheet.max_row + 1)):
-            row_types = []
-            for cell in list(sheet[row_num])[:10]:  # 최대 10열
-                if cell.value is None:
-                    row_types.append('E')  # Empty
-                elif isinstance(cell.value, (int, float)):
-                    row_types.append('N')  # Number
-                else:
-                    row_types.append('T')  # Text
-            type_grid.append(''.join(row_types))
-        return ','.join(type_grid)
-
-    def _extract_keywords(self, sheet) -> List[str]:
-        """주요 키워드 추출"""
-        keywords_to_find = [
-            '모델', 'model', '품목', '제품',
-            '주차', 'week', '일', 'day', '날짜', 'date',
-            '수량', 'qty', 'quantity', '생산',
-            '합계', 'total', 'sum'
-        ]
-
-        found_keywords = []
-        for row in sheet.iter_rows(min_row=1, max_row=5, max_col=10):
-            for cell in row:
-                if cell.value:
-                    cell_text = str(cell.value).lower()
-                    for keyword in keywords_to_find:
-                        if keyword.lower() in cell_text:
-                            found_keywords.append(keyword.lower())
-
-        return list(set(found_keywords))
-
-    def calculate_similarity(
-        self,
-        fingerprint1: str,
-        fingerprint2: str,
-        file1_path: str = None,
-        file2_path: str = None
-    ) -> float:
-        """두 핑거프린트의 유사도 계산 (0-100%)"""
-        # 기본: 핑거프린트 직접 비교
-        if fingerprint1 == fingerprint2:
-            return 100.0
-
-        # 상세 비교가 필요한 경우 (파일 경로 제공 시)
-        if file1_path and file2_path:
-            return self._detailed_similarity(file1_path, file2_path)
-
-        # 해시 기반 부분 일치 검사
-        common = sum(1 for a, b in zip(fingerprint1, fingerprint2) if a == b)
-        return (common / len(fingerprint1)) * 100
-
-    def _detailed_similarity(self, file1_path: str, file2_path: str) -> float:
-        """두 파일의 상세 유사도 계산"""
-        try:
-            import jellyfish
-
-            wb1 = openpyxl.load_workbook(file1_path, data_only=True)
-            wb2 = openpyxl.load_workbook(file2_path, data_only=True)
-            sheet1, sheet2 = wb1.active, wb2.active
-
-            scores = []
-
-            # 1. 구조 유사도 (40%)
-            row_diff = abs(sheet1.max_row - sheet2.max_row)
-            col_diff = abs(sheet1.max_column - sheet2.max_column)
-            structure_score = max(0, 100 - (row_diff + col_diff) * 5)
-            scores.append(structure_score * 0.4)
-
-            # 2. 헤더 유사도 (40%)
-            header1 = self._get_header_text(sheet1)
-            header2 = self._get_header_text(sheet2)
-            header_similarity = jellyfish.jaro_winkler_similarity(header1, header2)
-            scores.append(header_similarity * 100 * 0.4)
-
-            # 3. 키워드 유사도 (20%)
-            kw1 = set(self._extract_keywords(sheet1))
-            kw2 = set(self._extract_keywords(sheet2))
-            if kw1 or kw2:
-                keyword_score = len(kw1 & kw2) / len(kw1 | kw2) * 100
-            else:
-                keyword_score = 50
-            scores.append(keyword_score * 0.2)
-
-            return sum(scores)
-        except Exception:
-            return 50.0  # 오류 시 중간값
-
-    def _get_header_text(self, sheet) -> str:
-        """헤더 텍스트 추출"""
-        texts = []
-        for row_num in range(1, min(4, sheet.max_row + 1)):
-            for cell in list(sheet[row_num])[:10]:
-                if cell.value:
-                    texts.append(str(cell.value))
-        return ' '.join(texts)
+    def detailed_similarities(self, features: Dict[str, Any], candidates: List[Dict[str, Any]]) -> List[float]:
+        """저장된 구조 특징으로 후보 템플릿들의 상세 유사도 일괄 계산 (0-100, 파일 I/O 없음)
+
+        1. 구조 (40%): 열 수 차이 1개당 5점 감점 (70%) + 행 수 비율 (30%)
+           - 같은 양식이라도 데이터 행 수는 업로드마다 달라지므로 행 수는 비율로만 반영
+        2. 헤더 (40%): 헤더 텍스트 Jaro-Winkler
+        3. 키워드 (20%): 키워드 Jaccard (양쪽 모두 없으면 50)
+        """
+        if not candidates:
+            return []
+
+        # 1. 구조 유사도
+        max_row, max_col = features.get("dimensions") or (0, 0)
+        dimensions = np.array([c.get("dimensions") or (0, 0) for c in candidates], dtype=float)
+        col_score = np.maximum(0, 100 - np.abs(dimensions[:, 1] - max_col) * 5)
+        row_score = np.minimum(dimensions[:, 0], max_row) / np.maximum(np.maximum(dimensions[:, 0], max_row), 1) * 100
+        structure_score = col_score * 0.7 + row_score * 0.3
+
+        # 2. 헤더 유사도
+        header = self._header_text(features)
+        header_score = np.array([
+            jellyfish.jaro_winkler_similarity(header, self._header_text(c)) for c in candidates
+        ]) * 100
+
+        # 3. 키워드 유사도
+        keywords = set(features.get("keywords") or [])
+        keyword_score = np.array([
+            len(keywords & other) / len(keywords | other) * 100 if keywords or other else 50
+            for other in (set(c.get("keywords") or []) for c in candidates)
+        ], dtype=float)
+
+        return (structure_score * 0.4 + header_score * 0.4 + keyword_score * 0.2).tolist()
+
+    def _header_text(self, features: Dict[str, Any]) -> str:
+        """비교용 헤더 텍스트 (소문자, 공백 정리 - 헤더 원문이 없는 특징은 헤더 토큰으로 대체)"""
+        text = features.get("header_text")
+        if text is None:
+            text = ' '.join(token for row in features.get("header_tokens") or [] for token in row if token)
+        return ' '.join(text.split()).lower()
 
 
 fingerprint_service = FingerprintService()
@@ -0,0 +1,126 @@
+import re
+from itertools import chain
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+
+class ForecastGridEngine:
+    """CNC Forecast 수량 블록 벡터화 추출 엔진
+
+    헤더/날짜 행과 Model/Process 열 위치가 정해진 뒤의 데이터 블록을 2차원 배열로 올려
+    문자열 정리, 숫자 변환, 병합된 모델 셀 forward-fill, 합계 행 키워드 필터를
+    셀 단위 루프 대신 배열 연산으로 처리한다.
+    """
+
+    # 모델명에 포함되면 모델로 인정하지 않는 키워드 (합계/소계 행)
+    SKIP_KEYWORDS = ['total', '합계', 'sum', 'ag tech', 'agtech']
+
+    def __init__(self):
+        self._skip_pattern = '|'.join(re.escape(kw) for kw in self.SKIP_KEYWORDS)
+
+    def _text_column(self, values: np.ndarray) -> pd.Series:
+        """셀 값 열을 strip된 문자열로 변환 (빈 셀/거짓 값은 NA)"""
+        column = pd.Series(values, dtype=object)
+        truthy = column.notna() & (column != '') & (column != 0)
+        return column[truthy].astype(str).str.strip().reindex(column.index)
+
+    def _quantities(self, block: np.ndarray) -> np.ndarray:
+        """수량 블록을 정수 배열로 변환 (변환 불가 셀은 0)"""
+        try:
+            # 숫자/빈 셀만 있는 일반적인 경우 (None은 NaN)
+            values = block.astype(float)
+        except (TypeError, ValueError):
+            # 문자열이 섞인 열만 골라서 느린 경로로 변환
+            values = np.empty(block.shape, dtype=float)
+            for col in range(block.shape[1]):
+                try:
+                    values[:, col] = block[:, col].astype(float)
+                except (TypeError, ValueError):
+                    values[:, col] = self._coerce_mixed(block[:, col])
+
+        values[~np.isfinite(values)] = 0
+        return np.trunc(values).astype(np.int64)
+
+    def _coerce_mixed(self, cells: np.ndarray) -> np.ndarray:
+        """문자열/날짜가 섞인 셀 배열을 float 배열로 변환"""
+        flat = pd.Series(cells, dtype=object)
+
+        # 숫자 셀과 숫자 문자열은 한 번에 변환 (날짜 등 숫자가 아닌 객체는 NaN)
+        numbers = pd.to_numeric(flat, errors='coerce')
+
+        # 변환되지 않은 문자열만 천 단위 콤마 제거 후 재변환 ('-', 빈 문자열은 NaN)
+        retry = numbers.isna() & flat.notna()
+        if retry.any():
+            cleaned = flat[retry].str.replace(',', '', regex=False).str.strip()
+            numbers[retry] = pd.to_numeric(cleaned, errors='coerce')
+
+        return numbers.to_numpy(dtype=float, copy=True)
+
+    def extract(
+        self,
+        rows: Sequence[tuple],
+        model_idx: int,
+        process_idx: int,
+        date_items: Sequence[Tuple[int, str]],
+        carry_model: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        데이터 행 블록에서 (model, process, period, quantity) 항목 추출
+
+        Args:
+            rows: 시트 행 값 튜플 목록 (0-based 열 인덱스)
+            model_idx: Model 열 인덱스
+            process_idx: Process 열 인덱스
+            date_items: [(열 인덱스, 날짜 문자열)] - 날짜 열 순서
+            carry_model: 이전 블록의 마지막 모델명 (병합셀 이어받기)
+
+        Returns:
+            (추출 항목 목록, 다음 블록으로 넘길 모델명)
+        """
+        if not rows:
+            return [], carry_model
+
+        date_idx = [col for col, _ in date_items]
+        width = max([model_idx, process_idx] + date_idx) + 1
+        padded = [
+            values[:width] if len(values) >= width else values + (None,) * (width - len(values))
+            for values in rows
+        ]
+        grid = np.fromiter(
+            chain.from_iterable(padded), dtype=object, count=len(padded) * width
+        ).reshape(len(padded), width)
+
+        # 모델명: 합계 키워드가 없는 값만 갱신하고 빈 셀은 이전 모델 유지 (병합셀)
+        model_text = self._text_column(grid[:, model_idx])
+        is_skip = model_text.str.lower().str.contains(self._skip_pattern, regex=True, na=False)
+        models = model_text.where(model_text.notna() & ~is_skip)
+        models = pd.concat([pd.Series([carry_model], dtype=object), models], ignore_index=True).ffill()
+        next_carry = None if pd.isna(models.iloc[-1]) else models.iloc[-1]
+        models = models.iloc[1:].to_numpy()
+
+        processes = self._text_column(grid[:, process_idx]).to_numpy()
+
+        row_mask = (
+            pd.notna(models) & (models != '')
+            & pd.notna(processes) & (processes != '')
+        )
+        if not date_idx or not row_mask.any():
+            return [], next_carry
+
+        quantities = self._quantities(grid[row_mask][:, date_idx])
+        row_ids, col_ids = np.nonzero(quantities > 0)
+
+        models = models[row_mask][row_ids].tolist()
+        processes = processes[row_mask][row_ids].tolist()
+        periods = np.array([date_str for _, date_str in date_items], dtype=object)[col_ids].tolist()
+        counts = quantities[row_ids, col_ids].tolist()
+
+        results = [
+            {"model": model, "process": process, "period": period, "quantity": quantity}
+            for model, process, period, quantity in zip(models, processes, periods, counts)
+        ]
+        return results, next_carry
+
+
+forecast_grid_engine = ForecastGridEngine()
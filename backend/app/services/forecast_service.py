@@ -0,0 +1,111 @@
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import func, literal_column
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from app.models.actual_models import ForecastSnapshot
+from app.models.schemas import ForecastSaveItem, ForecastSaveResponse
+from app.services.price_service import price_service
+from app.services.snapshot_catalog_service import snapshot_catalog_service
+from app.services.summary_service import summary_service
+
+# executemany 1회당 행 수
+UPSERT_CHUNK_SIZE = 1000
+
+# (forecast_date, model, process) - process 없음은 빈 문자열로 정규화 (유니크 인덱스와 동일)
+SnapshotKey = Tuple[date, str, str]
+
+
+class ForecastService:
+    """Forecast 스냅샷 저장
+
+    같은 날 다시 업로드하면 (upload_date, forecast_date, model, process) 기준으로 덮어쓴다.
+    항목마다 SELECT 하지 않고 INSERT ... ON CONFLICT DO UPDATE 를 청크 단위 executemany 로 실행한다.
+    """
+
+    def save_snapshots(
+        self,
+        db: Session,
+        items: List[ForecastSaveItem],
+        upload_date: Optional[date] = None,
+        source_hash: Optional[str] = None
+    ) -> ForecastSaveResponse:
+        """Forecast 항목 저장 (업로드 날짜 이전 데이터는 스킵)"""
+        upload_date = upload_date or date.today()
+
+        # 업로드 날짜 이전의 데이터는 스킵 (과거는 실적 데이터 사용)
+        targets = [item for item in items if item.forecast_date >= upload_date]
+        skipped_count = len(items) - len(targets)
+
+        # forecast 날짜 시점 단가로 매출 일괄 계산 (model + process 조합, 단가 없으면 0)
+        revenues = price_service.calculate_revenues(
+            [item.model for item in targets],
+            [item.process or "" for item in targets],
+            [item.quantity for item in targets],
+            [item.forecast_date for item in targets]
+        )["revenues"].tolist()
+
+        # 같은 키가 여러 번 오면 마지막 항목 사용
+        rows: Dict[SnapshotKey, dict] = {}
+        for item, revenue in zip(targets, revenues):
+            rows[(item.forecast_date, item.model, item.process or "")] = {
+                "upload_date": upload_date,
+                "forecast_date": item.forecast_date,
+                "model": item.model,
+                "process": item.process,
+                "quantity": item.quantity,
+                "revenue": revenue
+            }
+
+        # 생성/수정 건수 구분용 - 같은 업로드 날짜의 기존 키를 한 번에 조회
+        existing = self._existing_keys(db, upload_date)
+        updated_count = sum(1 for key in rows if key in existing)
+        created_count = len(rows) - updated_count
+
+        payload = list(rows.values())
+        for start in range(0, len(payload), UPSERT_CHUNK_SIZE):
+            db.execute(self._upsert_statement(), payload[start:start + UPSERT_CHUNK_SIZE])
+
+        # 업로드 카탈로그와 일간 요약의 forecast 열을 같은 트랜잭션에서 갱신
+        snapshot_catalog_service.refresh(db, upload_date, source_hash)
+        summary_service.refresh_forecast(db)
+        db.commit()
+        snapshot_catalog_service.invalidate()
+
+        return ForecastSaveResponse(
+            success=True,
+            created_count=created_count,
+            updated_count=updated_count,
+            total_count=created_count + updated_count,
+            skipped_count=skipped_count
+        )
+
+    def _existing_keys(self, db: Session, upload_date: date) -> set:
+        """업로드 날짜의 기존 스냅샷 키 집합"""
+        existing = db.query(
+            ForecastSnapshot.forecast_date,
+            ForecastSnapshot.model,
+            func.coalesce(ForecastSnapshot.process, "")
+        ).filter(ForecastSnapshot.upload_date == upload_date).all()
+        return {tuple(row) for row in existing}
+
+    def _upsert_statement(self):
+        """(upload_date, forecast_date, model, process) 유니크 키 기준 upsert 문"""
+        stmt = insert(ForecastSnapshot)
+        return stmt.on_conflict_do_update(
+            index_elements=[
+                ForecastSnapshot.upload_date,
+                ForecastSnapshot.forecast_date,
+                ForecastSnapshot.model,
+                func.coalesce(ForecastSnapshot.process, literal_column("''"))
+            ],
+            set_={
+                "quantity": stmt.excluded.quantity,
+                "revenue": stmt.excluded.revenue,
+                "updated_at": func.now()
+            }
+        )
+
+
+forecast_service = ForecastService()
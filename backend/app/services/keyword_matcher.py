@@ -0,0 +1,84 @@
+from collections import deque
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List
+
+# 헤더 탐지 키워드 (소문자) - 핑거프린트 키워드 + CNC Forecast 형식 감지 키워드
+HEADER_KEYWORDS = (
+    '모델', 'model', '품목', '제품',
+    '주차', 'week', '일', 'day', '날짜', 'date',
+    '수량', 'qty', 'quantity', '생산',
+    '합계', 'total', 'sum',
+    'forecast', 'cnc',
+)
+
+_NO_MATCH: FrozenSet[str] = frozenset()
+
+
+class KeywordMatcher:
+    """Aho-Corasick 다중 키워드 매처
+
+    키워드마다 `keyword in text` 를 반복하는 대신 생성 시 오토마톤을 한 번 만들고
+    셀 텍스트를 한 번 훑어 포함된 키워드 전체를 찾는다 (대소문자 무시, 겹치는 키워드 포함).
+    헤더 셀은 단계(형식 감지, 레이아웃 탐색, 핑거프린트)마다 다시 검사되므로
+    텍스트별 결과를 LRU 캐시에 둔다.
+    """
+
+    def __init__(self, keywords: Iterable[str], cache_size: int = 4096):
+        self.keywords = tuple(dict.fromkeys(keyword.lower() for keyword in keywords if keyword))
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[FrozenSet[str]] = [_NO_MATCH]
+        self._build()
+        self.find = lru_cache(maxsize=cache_size)(self._scan)
+
+    def _build(self):
+        """키워드 트라이 + 실패 링크 구성"""
+        outputs = [set()]
+        for keyword in self.keywords:
+            node = 0
+            for char in keyword:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][char] = next_node
+                    self._goto.append({})
+                    self._fail.append(0)
+                    outputs.append(set())
+                node = next_node
+            outputs[node].add(keyword)
+
+        # 너비 우선으로 실패 링크 연결, 실패 노드의 출력을 합쳐 둔다
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                outputs[child] |= outputs[self._fail[child]]
+                queue.append(child)
+
+        self._output = [frozenset(found) if found else _NO_MATCH for found in outputs]
+
+    def _scan(self, text: str) -> FrozenSet[str]:
+        """텍스트에 포함된 키워드 집합"""
+        goto, fail, output = self._goto, self._fail, self._output
+        node = 0
+        found = _NO_MATCH
+        for char in text.lower():
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if output[node]:
+                found = found | output[node]
+        return found
+
+    def find_value(self, value) -> FrozenSet[str]:
+        """셀 값에 포함된 키워드 집합 (빈 값은 빈 집합)"""
+        if not value:
+            return _NO_MATCH
+        return self.find(str(value))
+
+
+header_keyword_matcher = KeywordMatcher(HEADER_KEYWORDS)
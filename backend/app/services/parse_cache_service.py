@@ -0,0 +1,118 @@
+import hashlib
+import json
+from datetime import date, datetime
+from typing import Optional
+from sqlalchemy.orm import Session
+
+from app.models.template_models import ExcelTemplate, ParseCache
+from app.models.schemas import ForecastUploadResponse
+from app.services.excel_service import excel_service
+from app.core.config import settings
+
+
+class ParseCacheService:
+    """업로드 파싱 결과 캐시 서비스
+
+    키는 업로드 파일 내용의 SHA-256 + 파서 버전 + 활성 템플릿 버전 + 오늘 날짜이다.
+    CNC 파서는 연도/월 넘김/현재 주차를 오늘 날짜로 정하므로 날짜가 바뀌면 다시 파싱한다.
+    파서, 템플릿, 날짜가 바뀌면 키가 달라지므로 이전 결과는 자연스럽게 쓰이지 않고
+    LRU(마지막 접근 시각) 순서로 개수/용량 한도를 넘는 항목부터 정리된다.
+    """
+
+    def _template_version(self, db: Session) -> str:
+        """활성 템플릿 구성(핑거프린트, 매핑)의 해시"""
+        templates = db.query(
+            ExcelTemplate.id,
+            ExcelTemplate.fingerprint,
+            ExcelTemplate.mapping
+        ).filter(
+            ExcelTemplate.is_active == True
+        ).order_by(ExcelTemplate.id).all()
+
+        payload = json.dumps(
+            [[t.id, t.fingerprint, t.mapping] for t in templates],
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+    def make_key(self, db: Session, file_hash: str) -> str:
+        """캐시 키 생성 (파싱 결과가 오늘 날짜에 따라 달라지므로 날짜 포함)"""
+        raw = f"{file_hash}|{excel_service.PARSER_VERSION}|{self._template_version(db)}|{date.today().isoformat()}"
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def get(self, db: Session, cache_key: str) -> Optional[ForecastUploadResponse]:
+        """캐시된 업로드 응답 조회 (적중 시 접근 시각 갱신)"""
+        if not settings.PARSE_CACHE_ENABLED:
+            return None
+
+        entry = db.query(ParseCache).filter(ParseCache.cache_key == cache_key).first()
+        if not entry:
+            return None
+
+        entry.hit_count += 1
+        entry.last_accessed_at = datetime.now()
+        db.commit()
+
+        return ForecastUploadResponse(**entry.response)
+
+    def put(
+        self,
+        db: Session,
+        cache_key: str,
+        file_hash: str,
+        response: ForecastUploadResponse
+    ):
+        """업로드 응답 캐시 저장 (데이터가 있는 결과만)"""
+        if not settings.PARSE_CACHE_ENABLED or not response.success or not response.data:
+            return
+
+        payload = response.model_dump(mode="json")
+        size_bytes = len(json.dumps(payload, ensure_ascii=False).encode())
+        if size_bytes > settings.PARSE_CACHE_MAX_MB * 1024 * 1024:
+            return
+
+        entry = db.query(ParseCache).filter(ParseCache.cache_key == cache_key).first()
+        if not entry:
+            entry = ParseCache(cache_key=cache_key, hit_count=0)
+            db.add(entry)
+
+        entry.file_hash = file_hash
+        entry.response = payload
+        entry.size_bytes = size_bytes
+        entry.last_accessed_at = datetime.now()
+        db.flush()
+
+        self._evict(db)
+        db.commit()
+
+    def _evict(self, db: Session):
+        """개수/용량 한도를 넘는 항목을 오래 전에 접근한 것부터 삭제"""
+        max_bytes = settings.PARSE_CACHE_MAX_MB * 1024 * 1024
+        entries = db.query(ParseCache.cache_key, ParseCache.size_bytes).order_by(
+            ParseCache.last_accessed_at.desc()
+        ).all()
+
+        kept = 0
+        total_bytes = 0
+        expired = []
+        for entry in entries:
+            if kept < settings.PARSE_CACHE_MAX_ENTRIES and total_bytes + (entry.size_bytes or 0) <= max_bytes:
+                kept += 1
+                total_bytes += entry.size_bytes or 0
+            else:
+                expired.append(entry.cache_key)
+
+        if expired:
+            db.query(ParseCache).filter(
+                ParseCache.cache_key.in_(expired)
+            ).delete(synchronize_session=False)
+
+    def clear(self, db: Session) -> int:
+        """캐시 전체 삭제"""
+        count = db.query(ParseCache).delete(synchronize_session=False)
+        db.commit()
+        return count
+
+
+parse_cache_service = ParseCacheService()
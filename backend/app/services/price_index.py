@@ -0,0 +1,120 @@
+from bisect import bisect_right
+from datetime import date
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+class PriceIndex:
+    """단가 조회 인덱스 (model → process → 단가 정보)
+
+    공정 없이 조회하면 해당 모델에 처음 등록된 단가를 기본 단가로 사용한다.
+    기본 단가는 등록/삭제 시 갱신해 두므로 조회는 항상 O(1)이다.
+    """
+
+    def __init__(self):
+        self._by_model: Dict[str, Dict[str, Dict]] = {}
+        self._defaults: Dict[str, Dict] = {}
+
+    def __len__(self) -> int:
+        return sum(len(processes) for processes in self._by_model.values())
+
+    def copy(self) -> "PriceIndex":
+        """수정용 복사본 (단가 정보 dict 는 교체만 하므로 공유)"""
+        clone = PriceIndex()
+        clone._by_model = {model: dict(processes) for model, processes in self._by_model.items()}
+        clone._defaults = dict(self._defaults)
+        return clone
+
+    def __iter__(self) -> Iterator[Dict]:
+        """등록된 단가 정보 (모델별 등록 순서)"""
+        for processes in self._by_model.values():
+            yield from processes.values()
+
+    def set(self, model: str, process: str, unit_price: float):
+        """단가 추가/수정 (수정 시 등록 순서 유지)"""
+        processes = self._by_model.setdefault(model, {})
+        processes[process] = {
+            "model": model,
+            "process": process,
+            "unit_price": unit_price
+        }
+        if model not in self._defaults or self._defaults[model]["process"] == process:
+            self._defaults[model] = next(iter(processes.values()))
+
+    def remove(self, model: str, process: str) -> bool:
+        """단가 삭제"""
+        processes = self._by_model.get(model)
+        if not processes or process not in processes:
+            return False
+
+        del processes[process]
+        if processes:
+            self._defaults[model] = next(iter(processes.values()))
+        else:
+            del self._by_model[model]
+            del self._defaults[model]
+        return True
+
+    def get(self, model: str, process: str = "") -> Optional[Dict]:
+        """모델+공정의 단가 정보 (공정 없이 조회하면 모델 기본 단가)"""
+        processes = self._by_model.get(model)
+        if not processes:
+            return None
+        item = processes.get(process)
+        if item:
+            return item
+        if not process:
+            return self._defaults.get(model)
+        return None
+
+    def get_prices(self, pairs: Iterable[Tuple[str, str]]) -> List[Optional[float]]:
+        """(model, process) 목록의 단가 일괄 조회 (단가 없으면 None)"""
+        results = []
+        for model, process in pairs:
+            item = self.get(model, process or "")
+            results.append(item["unit_price"] if item else None)
+        return results
+
+
+class PriceHistoryIndex:
+    """유효 시작일 기준 단가 이력 인덱스
+
+    (model, process) 별로 유효 시작일 오름차순 배열과 단가 배열을 두고
+    date 시점 단가를 이진 탐색(bisect)으로 찾는다.
+    """
+
+    def __init__(self):
+        self._versions: Dict[Tuple[str, str], Tuple[List[date], List[float]]] = {}
+
+    def copy(self) -> "PriceHistoryIndex":
+        """수정용 복사본"""
+        clone = PriceHistoryIndex()
+        clone._versions = {
+            key: (list(starts), list(prices)) for key, (starts, prices) in self._versions.items()
+        }
+        return clone
+
+    def set(self, model: str, process: str, effective_from: date, unit_price: float):
+        """버전 추가 (같은 시작일이면 단가 교체)"""
+        starts, prices = self._versions.setdefault((model, process), ([], []))
+        pos = bisect_right(starts, effective_from)
+        if pos and starts[pos - 1] == effective_from:
+            prices[pos - 1] = unit_price
+        else:
+            starts.insert(pos, effective_from)
+            prices.insert(pos, unit_price)
+
+    def has(self, model: str, process: str) -> bool:
+        return (model, process) in self._versions
+
+    def remove(self, model: str, process: str) -> bool:
+        """(model, process) 의 모든 버전 삭제"""
+        return self._versions.pop((model, process), None) is not None
+
+    def price_at(self, model: str, process: str, day: date) -> Optional[float]:
+        """date 시점의 단가 (유효한 버전이 없으면 None)"""
+        versions = self._versions.get((model, process))
+        if not versions:
+            return None
+        starts, prices = versions
+        pos = bisect_right(starts, day)
+        return prices[pos - 1] if pos else None
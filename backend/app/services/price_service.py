@@ -1,71 +1,175 @@
+import sqlite3
+import threading
+import numpy as np
 import pandas as pd
+from datetime import date
+from io import BytesIO
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from sqlalchemy import func, text
+from sqlalchemy.dialects.sqlite import insert
+
 from app.core.config import settings
+from app.core.database import HistorySessionLocal
+from app.models.price_models import PriceMaster, PriceHistory
+from app.services.price_index import PriceIndex, PriceHistoryIndex
+from app.services.price_validation import read_price_items
+
+# 유효 시작일 없이 처음 등록된 단가의 시작일 (과거 전체에 적용)
+PRICE_HISTORY_START = date(1900, 1, 1)
+
+# 단가 테이블 변경 감지용 요약값
+PRICE_FINGERPRINT_SQL = text("""
+    SELECT
+        (SELECT count(*) FROM price_master),
+        (SELECT max(updated_at) FROM price_master),
+        (SELECT total(unit_price) FROM price_master),
+        (SELECT count(*) FROM price_history),
+        (SELECT max(id) FROM price_history)
+""")
 
 
 class PriceService:
-    """단가 마스터 관리 서비스 (모델+공정 복합키)"""
+    """단가 마스터 관리 서비스 (모델+공정 복합키)
+
+    단가는 history.db 의 price_master(현재 단가), price_history(유효 시작일별 버전) 테이블에 저장하고
+    조회는 메모리 인덱스로 처리한다.
+    price_master.xlsx 는 가져오기/내보내기 형식으로만 사용한다.
+    - 최초 기동 시 테이블이 비어 있으면 xlsx 에서 가져온다.
+    - 변경 사항은 종료 시(flush) 또는 내보내기 요청 시에만 xlsx 로 기록한다.
+
+    인덱스는 (PriceIndex, PriceHistoryIndex) 스냅샷 하나로 교체한다.
+    쓰기/재로드는 복사본을 만들어 수정한 뒤 통째로 바꾸므로 조회는 잠금 없이 완성된 인덱스만 본다.
+    감시 스레드는 xlsx 수정 시각과 DB 의 PRAGMA data_version 을 주기적으로 확인해
+    앱 밖에서 바뀐 단가를 다시 읽어 온다.
+    """
 
     def __init__(self):
         self.price_master_path = Path(settings.PRICE_MASTER_PATH)
-        # 키: "model|process" 형식의 복합키
-        self._price_cache: Dict[str, Dict] = {}
-        self._load_price_master()
-
-    def _make_key(self, model: str, process: str = "") -> str:
-        """모델+공정 복합키 생성"""
-        return f"{model}|{process}"
-
-    def _parse_key(self, key: str) -> tuple:
-        """복합키에서 모델, 공정 분리"""
-        parts = key.split("|", 1)
-        return parts[0], parts[1] if len(parts) > 1 else ""
-
-    def _load_price_master(self):
-        """단가 마스터 파일 로드"""
-        if not self.price_master_path.exists():
-            return
+        # (model → process → 단가 정보 인덱스, (model, process) → 유효 시작일별 단가 이력 인덱스)
+        self._snapshot: Optional[Tuple[PriceIndex, PriceHistoryIndex]] = None
+        # 쓰기/재로드 직렬화 (조회는 잠그지 않음)
+        self._lock = threading.RLock()
+        # xlsx 에 아직 기록하지 않은 변경이 있는지
+        self._xlsx_dirty = False
+        # 마지막으로 반영한 xlsx 수정 시각 / 단가 테이블 요약값
+        self._xlsx_mtime: Optional[float] = None
+        # 마지막으로 기록/반영한 xlsx 내용 {(model, process): 단가} - 파일에서 실제로 바뀐 행만 가려내는 기준
+        self._xlsx_prices: Optional[Dict[Tuple[str, str], float]] = None
+        self._fingerprint: Optional[tuple] = None
+        self._watcher: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    def _current(self) -> Tuple[PriceIndex, PriceHistoryIndex]:
+        snapshot = self._snapshot
+        if snapshot is None:
+            self.load()
+            snapshot = self._snapshot
+        return snapshot
+
+    @property
+    def index(self) -> PriceIndex:
+        return self._current()[0]
+
+    @property
+    def history(self) -> PriceHistoryIndex:
+        return self._current()[1]
+
+    def load(self):
+        """DB 에서 단가 인덱스 로드 (테이블이 비어 있으면 xlsx 가져오기)"""
+        with self._lock:
+            db = HistorySessionLocal()
+            try:
+                if db.query(PriceMaster.id).first() is None and self.price_master_path.exists():
+                    items = self._read_xlsx(self.price_master_path)
+                    imported = self._upsert(db, items)
+                    db.commit()
+                    self._xlsx_prices = {(model, process): unit_price for model, process, unit_price in items}
+                    print(f"[INFO] Imported {imported} prices from {self.price_master_path.name}")
+
+                # 이력이 없는 단가는 과거 전체에 적용되는 버전으로 등록
+                db.execute(text("""
+                    INSERT INTO price_history (model, process, effective_from, unit_price, created_at)
+                    SELECT pm.model, pm.process, :start, pm.unit_price, CURRENT_TIMESTAMP
+                    FROM price_master pm
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM price_history h
+                        WHERE h.model = pm.model AND h.process = pm.process
+                    )
+                """), {"start": PRICE_HISTORY_START})
+                db.commit()
+
+                index = PriceIndex()
+                rows = db.query(
+                    PriceMaster.model, PriceMaster.process, PriceMaster.unit_price
+                ).order_by(PriceMaster.id).all()
+                for model, process, unit_price in rows:
+                    index.set(model, process, unit_price)
+
+                history = PriceHistoryIndex()
+                versions = db.query(
+                    PriceHistory.model, PriceHistory.process,
+                    PriceHistory.effective_from, PriceHistory.unit_price
+                ).all()
+                for model, process, effective_from, unit_price in versions:
+                    history.set(model, process, effective_from, unit_price)
+
+                self._fingerprint = tuple(db.execute(PRICE_FINGERPRINT_SQL).one())
+                self._snapshot = (index, history)
+            finally:
+                db.close()
+
+            if self._xlsx_mtime is None:
+                self._xlsx_mtime = self._read_xlsx_mtime()
+                # 시작 시점의 파일 내용을 이후 외부 변경 비교 기준으로 사용
+                if self._xlsx_prices is None and self._xlsx_mtime is not None:
+                    self._xlsx_prices = {
+                        (model, process): unit_price
+                        for model, process, unit_price in self._read_xlsx(self.price_master_path)
+                    }
 
-        df = pd.read_excel(self.price_master_path)
-        # Expected columns: 모델, 공정, 단가($)
-        for _, row in df.iterrows():
-            model = str(row.get("모델", row.get("model", "")))
-            process = str(row.get("공정", row.get("process", "")))
-            price = float(row.get("단가($)", row.get("unit_price", 0)))
-            if model:
-                key = self._make_key(model, process)
-                self._price_cache[key] = {
-                    "model": model,
-                    "process": process,
-                    "unit_price": price
-                }
+    def _read_xlsx(self, source) -> List[Tuple[str, str, float]]:
+        """단가 마스터 Excel 읽기 → (model, process, unit_price) 목록 (잘못된 행은 제외)"""
+        items, errors = read_price_items(source)
+        for error in errors:
+            print(f"[WARN] Skipped price row {error['row']}: {error['message']}")
+        return items
+
+    def _read_xlsx_mtime(self) -> Optional[float]:
+        try:
+            return self.price_master_path.stat().st_mtime
+        except FileNotFoundError:
+            return None
+
+    def _upsert(self, db, items: List[Tuple[str, str, float]]) -> int:
+        """단가 일괄 upsert (commit 은 호출한 쪽에서)"""
+        if not items:
+            return 0
+        stmt = insert(PriceMaster)
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["model", "process"],
+                set_={"unit_price": stmt.excluded.unit_price, "updated_at": func.now()}
+            ),
+            [
+                {"model": model, "process": process, "unit_price": unit_price}
+                for model, process, unit_price in items
+            ]
+        )
+        return len(items)
 
     def get_price(self, model: str, process: str = "") -> Optional[float]:
-        """모델+공정의 단가 조회"""
-        key = self._make_key(model, process)
-        item = self._price_cache.get(key)
-        if item:
-            return item["unit_price"]
-        # process 없이 검색한 경우, 해당 모델의 첫 번째 단가 반환
-        if not process:
-            for k, v in self._price_cache.items():
-                if v["model"] == model:
-                    return v["unit_price"]
-        return None
+        """모델+공정의 단가 조회 (process 없이 검색하면 해당 모델의 첫 번째 단가)"""
+        item = self.index.get(model, process)
+        return item["unit_price"] if item else None
+
+    def get_prices(self, pairs: Iterable[Tuple[str, str]]) -> List[Optional[float]]:
+        """(model, process) 목록의 단가 일괄 조회"""
+        return self.index.get_prices(pairs)
 
     def get_price_info(self, model: str, process: str = "") -> Optional[Dict]:
-        """모델+공정의 전체 가격 정보 조회"""
-        key = self._make_key(model, process)
-        item = self._price_cache.get(key)
-        if item:
-            return item
-        # process 없이 검색한 경우, 해당 모델의 첫 번째 정보 반환
-        if not process:
-            for k, v in self._price_cache.items():
-                if v["model"] == model:
-                    return v
-        return None
+        """모델+공정의 전체 가격 정보 조회 (process 없이 검색하면 해당 모델의 첫 번째 정보)"""
+        return self.index.get(model, process)
 
     def get_all_prices(self) -> List[Dict]:
         """전체 단가 목록 조회"""
@@ -75,48 +179,299 @@ class PriceService:
                 "process": v["process"],
                 "unit_price": v["unit_price"]
             }
-            for v in self._price_cache.values()
+            for v in self.index
         ]
 
-    def add_price(self, model: str, unit_price: float, process: str = ""):
+    def _price_at(
+        self,
+        index: PriceIndex,
+        history: PriceHistoryIndex,
+        model: str,
+        process: str,
+        day: date
+    ) -> Optional[float]:
+        if not process and not history.has(model, ""):
+            default = index.get(model)
+            if default is None:
+                return None
+            process = default["process"]
+        return history.price_at(model, process, day)
+
+    def price_at(self, model: str, process: str, day: date) -> Optional[float]:
+        """date 시점의 모델+공정 단가 (process 없이 검색하면 모델 기본 단가의 공정 기준)"""
+        index, history = self._current()
+        return self._price_at(index, history, model, process, day)
+
+    def prices_at(self, keys: Iterable[Tuple[str, str, date]]) -> List[Optional[float]]:
+        """(model, process, date) 목록의 시점 단가 일괄 조회"""
+        index, history = self._current()
+        return [
+            self._price_at(index, history, model, process or "", day)
+            for model, process, day in keys
+        ]
+
+    def calculate_revenues(
+        self,
+        models: Sequence[str],
+        processes: Optional[Sequence[str]],
+        quantities: Sequence[float],
+        dates: Optional[Sequence[date]] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        매출 일괄 계산
+
+        행마다 단가를 조회하지 않고 고유 (model, process, date) 키만 조회한 뒤
+        numpy 배열 연산으로 단가/매출을 채운다.
+
+        Args:
+            models, processes, quantities: 같은 길이의 컬럼 배열 (processes=None 이면 모델 기본 단가)
+            dates: 시점 단가 기준일 (없으면 현재 단가)
+
+        Returns:
+            unit_prices, revenues, missing(단가 없음 mask) 배열 - 단가가 없는 행의 단가/매출은 0
+        """
+        count = len(models)
+        keys = pd.DataFrame({
+            "model": pd.Series(models, dtype=object),
+            "process": pd.Series([""] * count if processes is None else processes, dtype=object).fillna(""),
+            "date": pd.Series([None] * count if dates is None else dates, dtype=object)
+        })
+        codes, uniques = pd.MultiIndex.from_frame(keys).factorize()
+
+        if dates is None:
+            found = self.get_prices((model, process) for model, process, _ in uniques)
+        else:
+            found = self.prices_at(uniques)
+        unique_prices = np.array([np.nan if p is None else p for p in found], dtype=float)
+
+        unit_prices = unique_prices[codes] if count else np.zeros(0)
+        missing = np.isnan(unit_prices)
+        unit_prices[missing] = 0
+        revenues = unit_prices * np.asarray(quantities, dtype=float)
+
+        return {"unit_prices": unit_prices, "revenues": revenues, "missing": missing}
+
+    def add_price(
+        self,
+        model: str,
+        unit_price: float,
+        process: str = "",
+        effective_from: Optional[date] = None
+    ):
         """단가 추가/수정"""
-        key = self._make_key(model, process)
-        self._price_cache[key] = {
-            "model": model,
-            "process": process,
-            "unit_price": unit_price
-        }
-        self._save_price_master()
-
-    def delete_price(self, model: str, process: str = "") -> bool:
-        """단가 삭제"""
-        key = self._make_key(model, process)
-        if key in self._price_cache:
-            del self._price_cache[key]
-            self._save_price_master()
+        self.bulk_register([(model, process, unit_price)], effective_from)
+
+    def bulk_register(
+        self,
+        items: List[Tuple[str, str, float]],
+        effective_from: Optional[date] = None,
+        mark_dirty: bool = True
+    ) -> int:
+        """
+        단가 일괄 추가/수정 (한 트랜잭션) - 등록 건수 반환
+
+        Args:
+            items: (model, process, unit_price) 목록
+            effective_from: 유효 시작일 (없으면 기존 단가는 오늘부터, 새 단가는 과거 전체에 적용)
+            mark_dirty: 종료 시 xlsx 에 기록할지 여부 (xlsx 에서 가져온 경우 False)
+        """
+        if not items:
+            return 0
+
+        today = date.today()
+        if effective_from and effective_from > today:
+            raise ValueError("유효 시작일은 오늘 이후일 수 없습니다")
+
+        with self._lock:
+            current_index, current_history = self._current()
+            index, history = current_index.copy(), current_history.copy()
+
+            versions = []
+            for model, process, unit_price in items:
+                start = effective_from or (today if history.has(model, process) else PRICE_HISTORY_START)
+                history.set(model, process, start, unit_price)
+                versions.append((model, process, start, unit_price))
+
+            # 현재 단가 = 오늘 시점 버전 (과거 시작일로 등록해도 이후 버전이 있으면 그 단가 유지)
+            current = {
+                (model, process): history.price_at(model, process, today)
+                for model, process, _ in items
+            }
+            for (model, process), unit_price in current.items():
+                index.set(model, process, unit_price)
+
+            db = HistorySessionLocal()
+            try:
+                stmt = insert(PriceHistory)
+                db.execute(
+                    stmt.on_conflict_do_update(
+                        index_elements=["model", "process", "effective_from"],
+                        set_={"unit_price": stmt.excluded.unit_price}
+                    ),
+                    [
+                        {"model": model, "process": process, "effective_from": start, "unit_price": unit_price}
+                        for model, process, start, unit_price in versions
+                    ]
+                )
+                self._upsert(db, [
+                    (model, process, unit_price) for (model, process), unit_price in current.items()
+                ])
+                db.commit()
+                self._fingerprint = tuple(db.execute(PRICE_FINGERPRINT_SQL).one())
+            finally:
+                db.close()
+
+            # 저장이 끝난 뒤에만 새 인덱스로 교체
+            self._snapshot = (index, history)
+            if mark_dirty:
+                self._xlsx_dirty = True
+            return len(items)
+
+    def delete_price(self, model: str, process: str = "", mark_dirty: bool = True) -> bool:
+        """단가 삭제 (이력 포함)"""
+        with self._lock:
+            db = HistorySessionLocal()
+            try:
+                deleted = db.query(PriceMaster).filter(
+                    PriceMaster.model == model,
+                    PriceMaster.process == process
+                ).delete(synchronize_session=False)
+                db.query(PriceHistory).filter(
+                    PriceHistory.model == model,
+                    PriceHistory.process == process
+                ).delete(synchronize_session=False)
+                db.commit()
+                self._fingerprint = tuple(db.execute(PRICE_FINGERPRINT_SQL).one())
+            finally:
+                db.close()
+
+            if not deleted:
+                return False
+
+            current_index, current_history = self._current()
+            index, history = current_index.copy(), current_history.copy()
+            index.remove(model, process)
+            history.remove(model, process)
+            self._snapshot = (index, history)
+            if mark_dirty:
+                self._xlsx_dirty = True
             return True
-        return False
 
-    def _save_price_master(self):
-        """단가 마스터 파일 저장"""
+    def import_xlsx(self, contents: bytes) -> int:
+        """단가 마스터 Excel 가져오기 (기존 단가는 수정, 새 단가는 추가)"""
+        return self.bulk_register(self._read_xlsx(BytesIO(contents)))
+
+    def export_xlsx(self) -> bytes:
+        """현재 단가 마스터를 Excel 로 내보내기"""
         data = [
             {
                 "모델": v["model"],
                 "공정": v["process"],
                 "단가($)": v["unit_price"]
             }
-            for v in self._price_cache.values()
+            for v in self.index
         ]
-        df = pd.DataFrame(data)
-        self.price_master_path.parent.mkdir(parents=True, exist_ok=True)
-        df.to_excel(self.price_master_path, index=False)
+        output = BytesIO()
+        pd.DataFrame(data, columns=["모델", "공정", "단가($)"]).to_excel(output, index=False)
+        return output.getvalue()
+
+    def flush(self) -> bool:
+        """xlsx 에 반영되지 않은 변경이 있으면 price_master.xlsx 저장"""
+        with self._lock:
+            if not self._xlsx_dirty:
+                return False
+            prices = {(v["model"], v["process"]): v["unit_price"] for v in self.index}
+            content = self.export_xlsx()
+            self.price_master_path.parent.mkdir(parents=True, exist_ok=True)
+            self.price_master_path.write_bytes(content)
+            self._xlsx_dirty = False
+            # 직접 기록한 파일은 외부 변경으로 보지 않음
+            self._xlsx_mtime = self._read_xlsx_mtime()
+            self._xlsx_prices = prices
+            return True
+
+    def sync_from_xlsx(self) -> Dict[str, int]:
+        """
+        앱 밖에서 수정된 price_master.xlsx 반영
+
+        마지막으로 기록/반영한 파일 내용과 비교해 파일에서 바뀐 행만 upsert 한다.
+        API 로 바꾼 단가가 아직 xlsx 에 기록되지 않았어도 파일의 예전 값으로 덮어쓰지 않으며,
+        파일에 없는 단가(잘못된 행 포함)는 삭제하지 않는다 (이력도 그대로 유지).
+        """
+        with self._lock:
+            mtime = self._read_xlsx_mtime()
+            items = self._read_xlsx(self.price_master_path)
+
+            current = {(v["model"], v["process"]): v["unit_price"] for v in self.index}
+            # 시작 시 파일이 없었으면 기준이 없으므로 현재 단가와 비교
+            baseline = self._xlsx_prices if self._xlsx_prices is not None else current
+            changed = [
+                (model, process, unit_price)
+                for model, process, unit_price in items
+                if baseline.get((model, process)) != unit_price
+                and current.get((model, process)) != unit_price
+            ]
+
+            self.bulk_register(changed, mark_dirty=False)
+
+            self._xlsx_mtime = mtime
+            self._xlsx_prices = {(model, process): unit_price for model, process, unit_price in items}
+            # 파일에 없는 단가가 남아 있으면 다음 flush 때 파일을 다시 기록
+            if current.keys() - self._xlsx_prices.keys():
+                self._xlsx_dirty = True
+            return {"updated": len(changed)}
+
+    def start_watcher(self, interval: float = None):
+        """외부 변경 감시 스레드 시작"""
+        if self._watcher is not None:
+            return
+        self._stop_event.clear()
+        self._watcher = threading.Thread(
+            target=self._watch,
+            args=(interval or settings.PRICE_RELOAD_INTERVAL,),
+            name="price-watcher",
+            daemon=True
+        )
+        self._watcher.start()
+
+    def stop_watcher(self):
+        """감시 스레드 종료"""
+        if self._watcher is None:
+            return
+        self._stop_event.set()
+        self._watcher.join()
+        self._watcher = None
+
+    def _watch(self, interval: float):
+        """xlsx 수정 시각과 DB data_version 을 주기적으로 확인"""
+        # data_version 은 다른 연결의 커밋만 반영하므로 감시 전용 연결 사용
+        conn = sqlite3.connect(settings.HISTORY_DB_PATH)
+        try:
+            data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+            while not self._stop_event.wait(interval):
+                try:
+                    mtime = self._read_xlsx_mtime()
+                    if mtime is not None and mtime != self._xlsx_mtime:
+                        result = self.sync_from_xlsx()
+                        print(f"[INFO] Price master reloaded from xlsx: {result}")
+
+                    version = conn.execute("PRAGMA data_version").fetchone()[0]
+                    if version != data_version:
+                        data_version = version
+                        # 같은 DB 의 실적 입력 등에도 바뀌므로 단가 테이블 요약값으로 한 번 더 확인
+                        fingerprint = tuple(conn.execute(str(PRICE_FINGERPRINT_SQL)).fetchone())
+                        if fingerprint != self._fingerprint:
+                            self.load()
+                            print("[INFO] Price master reloaded from database")
+                except Exception as e:
+                    # 저장 중인 파일 등 일시적인 오류는 다음 주기에 다시 시도
+                    print(f"[WARN] Price master reload failed: {e}")
+        finally:
+            conn.close()
 
     def calculate_revenue(self, model: str, quantity: int) -> float:
         """매출 계산"""
-        price = self.get_price(model)
-        if price is None:
-            return 0
-        return price * quantity
+        return float(self.calculate_revenues([model], None, [quantity])["revenues"][0])
 
 
 price_service = PriceService()
@@ -0,0 +1,137 @@
+import numpy as np
+import pandas as pd
+from io import BytesIO
+from typing import Any, Dict, List, Tuple
+
+VALID_PROCESSES = ['CNC 1 ~ CNC 2', 'CL1 ~ CL2', 'TRI']
+REQUIRED_COLUMNS = {"모델", "공정", "단가($)"}
+# 단가 마스터 파일의 영문 컬럼명
+COLUMN_ALIASES = {"model": "모델", "process": "공정", "unit_price": "단가($)"}
+
+
+class PriceFileError(ValueError):
+    """단가 파일을 읽을 수 없거나 필수 컬럼이 없는 경우"""
+
+
+def _text_column(df: pd.DataFrame, column: str) -> pd.Series:
+    """문자열 컬럼 정규화 (빈 칸/NaN → "", 앞뒤 공백 제거)"""
+    if column not in df.columns:
+        return pd.Series("", index=df.index)
+    values = df[column]
+    return values.where(values.notna(), "").astype(str).str.strip()
+
+
+def check_price_frame(
+    df: pd.DataFrame,
+    strict: bool = True
+) -> Tuple[pd.DataFrame, List[Dict[str, Any]]]:
+    """
+    단가 DataFrame 을 컬럼 단위로 정규화/검증
+
+    행마다 검사하지 않고 규칙별 boolean mask 로 오류 행을 찾는다.
+    한 행에는 첫 번째로 걸린 규칙의 오류만 보고한다.
+
+    Args:
+        df: 모델, 공정, 단가($) 컬럼의 DataFrame (영문 컬럼명도 허용)
+        strict: True 면 업로드 검증 규칙 (공정 필수, 대문자 변환 후 VALID_PROCESSES 확인,
+                0 이하 단가와 중복 모델+공정은 오류), False 면 단가 마스터 가져오기 규칙
+                (공정 빈 칸/0 이하 단가 허용, 중복은 마지막 행 적용)
+
+    Returns:
+        (model, process, unit_price 컬럼의 유효 행 DataFrame, 오류 목록)
+    """
+    df = df.rename(columns=COLUMN_ALIASES)
+    model = _text_column(df, "모델")
+    process = _text_column(df, "공정")
+    if strict:
+        process = process.str.upper()
+
+    raw_price = df["단가($)"] if "단가($)" in df.columns else pd.Series(np.nan, index=df.index)
+    price = pd.to_numeric(raw_price, errors="coerce")
+
+    rules = [
+        (model == "", "모델", "모델명이 비어있습니다"),
+    ]
+    if strict:
+        rules += [
+            (process == "", "공정", "공정이 비어있습니다"),
+            (~process.isin(VALID_PROCESSES), "공정",
+             f"유효하지 않은 공정입니다. ({', '.join(VALID_PROCESSES)} 중 선택)"),
+        ]
+    # 빈 칸/숫자가 아닌 단가는 저장할 수 없으므로 두 규칙 모두 오류
+    rules += [
+        (raw_price.isna(), "단가($)", "단가가 비어있습니다"),
+        (price.isna(), "단가($)", "단가는 숫자여야 합니다"),
+    ]
+    if strict:
+        rules.append((price <= 0, "단가($)", "단가는 0보다 커야 합니다"))
+
+    row_numbers = df.index.to_numpy() + 2  # Excel row number (1-indexed + header)
+    errors = []
+    invalid = pd.Series(False, index=df.index)
+    for mask, field, message in rules:
+        hit = mask & ~invalid
+        errors.extend(
+            {"row": int(row), "field": field, "message": message}
+            for row in row_numbers[hit.to_numpy()]
+        )
+        invalid |= hit
+
+    valid = pd.DataFrame({
+        "model": model[~invalid],
+        "process": process[~invalid],
+        "unit_price": price[~invalid].astype(float)
+    })
+
+    if strict:
+        duplicated = valid.duplicated(["model", "process"], keep="first")
+        errors.extend(
+            {"row": int(row), "field": "모델", "message": "중복된 모델+공정입니다"}
+            for row in row_numbers[valid.index[duplicated.to_numpy()]]
+        )
+        valid = valid[~duplicated]
+    else:
+        valid = valid.drop_duplicates(["model", "process"], keep="last")
+
+    errors.sort(key=lambda e: e["row"])
+    return valid, errors
+
+
+def read_price_items(source, strict: bool = False) -> Tuple[List[Tuple[str, str, float]], List[Dict[str, Any]]]:
+    """단가 Excel 읽기 → ((model, process, unit_price) 목록, 오류 목록)"""
+    valid, errors = check_price_frame(pd.read_excel(source), strict=strict)
+    return list(valid.itertuples(index=False, name=None)), errors
+
+
+def validate_price_file(contents: bytes) -> Dict[str, Any]:
+    """단가 일괄 등록용 Excel 파일 검증 (프로세스 풀 작업용)
+
+    Returns:
+        valid, total_rows, valid_rows, error_rows, errors, preview 를 담은 dict
+    """
+    try:
+        df = pd.read_excel(BytesIO(contents))
+    except Exception as e:
+        raise PriceFileError(f"파일을 읽을 수 없습니다: {str(e)}")
+
+    # Check required columns
+    actual_columns = set(df.columns)
+
+    if not REQUIRED_COLUMNS.issubset(actual_columns):
+        missing = REQUIRED_COLUMNS - actual_columns
+        raise PriceFileError(f"필수 컬럼이 누락되었습니다: {', '.join(missing)}")
+
+    valid, errors = check_price_frame(df, strict=True)
+
+    total_rows = len(df)
+    error_rows = len(errors)
+    valid_rows = len(valid)
+
+    return {
+        "valid": error_rows == 0 and valid_rows > 0,
+        "total_rows": total_rows,
+        "valid_rows": valid_rows,
+        "error_rows": error_rows,
+        "errors": errors,
+        "preview": valid.to_dict("records")
+    }
@@ -0,0 +1,221 @@
+import heapq
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.actual_models import (
+    ActualRecord, ForecastSnapshot, DailySummary, DailyModelSummary
+)
+from app.models.schemas import (
+    RevenueReportResponse, RevenueItem, RevenueSummary, RevenueGroup
+)
+from app.services.snapshot_catalog_service import snapshot_catalog_service
+
+# 지원하는 집계 단위
+GROUP_BY_OPTIONS = ("day", "week", "month", "model", "process")
+
+
+class ReportService:
+    """매출 리포트 집계
+
+    기간 합계와 그룹별 합계는 일간 요약 롤업(daily_summary, daily_model_summary)에서
+    SQL(SUM/GROUP BY)로 계산하고, 행 단위 상세(items)는 요청한 경우에만 원본 테이블에서 조회한다.
+    """
+
+    def build_revenue_report(
+        self,
+        db: Session,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        view_mode: str = "combined",
+        group_by: Optional[str] = None,
+        detail: Optional[bool] = None
+    ) -> RevenueReportResponse:
+        """
+        매출 리포트 생성
+
+        Args:
+            view_mode: actual, forecast, combined
+            group_by: day, week(ISO 주), month, model, process - 없으면 그룹 집계 생략
+            detail: 행 단위 상세 포함 여부 (기본: group_by 가 없을 때만 포함)
+        """
+        today = date.today()
+
+        if not start_date:
+            start_date = today.replace(day=1)  # 이번 달 1일
+        if not end_date:
+            end_date = (start_date.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+        if detail is None:
+            detail = group_by is None
+
+        include_actual = view_mode in ["actual", "combined"]
+        include_forecast = False
+        latest_upload = None
+
+        if view_mode in ["forecast", "combined"]:
+            # 가장 최근 업로드된 forecast 스냅샷 사용 (업로드 카탈로그 캐시)
+            latest_upload = snapshot_catalog_service.latest_upload(db)
+            include_forecast = latest_upload is not None
+
+        # 요약/그룹 합계는 일간 요약 롤업에서 조회 (원본 행 수와 무관)
+        totals = db.query(
+            func.sum(DailySummary.total_actual_revenue),
+            func.sum(DailySummary.total_forecast_revenue)
+        ).filter(
+            DailySummary.date >= start_date,
+            DailySummary.date <= end_date
+        ).one()
+
+        actual_revenue = (totals[0] or 0) if include_actual else 0
+        forecast_revenue = (totals[1] or 0) if include_forecast else 0
+        total_revenue = actual_revenue + forecast_revenue
+        achievement_rate = (actual_revenue / total_revenue * 100) if total_revenue > 0 else 0
+
+        groups = []
+        if group_by:
+            groups = self._group_totals(
+                db, start_date, end_date, group_by, include_actual, include_forecast
+            )
+
+        items = []
+        if detail:
+            sources = []
+            if include_actual:
+                sources.append((
+                    "actual",
+                    self._actual_query(db, start_date, end_date),
+                    ActualRecord.date,
+                    ActualRecord
+                ))
+            if include_forecast:
+                sources.append((
+                    "forecast",
+                    self._forecast_query(db, latest_upload, start_date, end_date),
+                    ForecastSnapshot.forecast_date,
+                    ForecastSnapshot
+                ))
+            items = self._detail_items(sources)
+
+        return RevenueReportResponse(
+            items=items,
+            summary=RevenueSummary(
+                actual_revenue=actual_revenue,
+                forecast_revenue=forecast_revenue,
+                total_revenue=total_revenue,
+                achievement_rate=round(achievement_rate, 1)
+            ),
+            period_start=start_date,
+            period_end=end_date,
+            group_by=group_by,
+            groups=groups
+        )
+
+    def _actual_query(self, db: Session, start_date: date, end_date: date):
+        """기간 내 실적 조회 쿼리"""
+        return db.query(ActualRecord).filter(
+            ActualRecord.date >= start_date,
+            ActualRecord.date <= end_date
+        )
+
+    def _forecast_query(self, db: Session, upload_date: date, start_date: date, end_date: date):
+        """기간 내 forecast 조회 쿼리 (지정 업로드 스냅샷)"""
+        return db.query(ForecastSnapshot).filter(
+            ForecastSnapshot.upload_date == upload_date,
+            ForecastSnapshot.forecast_date >= start_date,
+            ForecastSnapshot.forecast_date <= end_date
+        )
+
+    def _group_key(self, group_by: str):
+        """집계 단위별 (롤업 테이블, GROUP BY 식)
+
+        week 는 일 단위로 집계 후 Python 에서 ISO 주로 합산 (SQLite strftime 에 ISO 주 없음)
+        """
+        if group_by in ("day", "week"):
+            return DailySummary, DailySummary.date
+        if group_by == "month":
+            return DailySummary, func.strftime("%Y-%m", DailySummary.date)
+        if group_by == "model":
+            return DailyModelSummary, DailyModelSummary.model
+        return DailyModelSummary, DailyModelSummary.process
+
+    def _format_key(self, group_by: str, value) -> str:
+        """그룹 키 문자열"""
+        if group_by == "day":
+            return value.isoformat()
+        if group_by == "week":
+            iso = value.isocalendar()
+            return f"{iso[0]}-W{iso[1]:02d}"
+        return value
+
+    def _group_totals(
+        self,
+        db: Session,
+        start_date: date,
+        end_date: date,
+        group_by: str,
+        include_actual: bool,
+        include_forecast: bool
+    ) -> List[RevenueGroup]:
+        """그룹별 수량/매출 합계"""
+        table, key_expr = self._group_key(group_by)
+        if table is DailySummary:
+            columns = (
+                DailySummary.total_actual_qty, DailySummary.total_actual_revenue,
+                DailySummary.actual_record_count,
+                DailySummary.total_forecast_qty, DailySummary.total_forecast_revenue
+            )
+        else:
+            columns = (
+                DailyModelSummary.actual_qty, DailyModelSummary.actual_revenue,
+                DailyModelSummary.actual_record_count,
+                DailyModelSummary.forecast_qty, DailyModelSummary.forecast_revenue
+            )
+
+        rows = db.query(key_expr, *[func.sum(column) for column in columns]).filter(
+            table.date >= start_date,
+            table.date <= end_date
+        ).group_by(key_expr).all()
+
+        groups: Dict[str, RevenueGroup] = {}
+        for value, actual_qty, actual_rev, actual_count, forecast_qty, forecast_rev in rows:
+            has_actual = include_actual and bool(actual_count)
+            has_forecast = include_forecast and bool(forecast_qty or forecast_rev)
+            if not (has_actual or has_forecast):
+                continue
+
+            key = self._format_key(group_by, value)
+            group = groups.setdefault(key, RevenueGroup(key=key))
+            if has_actual:
+                group.actual_quantity += actual_qty or 0
+                group.actual_revenue += actual_rev or 0
+            if has_forecast:
+                group.forecast_quantity += forecast_qty or 0
+                group.forecast_revenue += forecast_rev or 0
+            group.total_revenue = group.actual_revenue + group.forecast_revenue
+
+        return [groups[key] for key in sorted(groups)]
+
+    def _detail_items(self, sources: list) -> List[RevenueItem]:
+        """행 단위 상세 (날짜, 모델 순 - 같은 키는 실적이 먼저)"""
+        streams = []
+        for record_type, query, date_column, table in sources:
+            rows = query.with_entities(
+                date_column, table.model, table.process, table.quantity, table.revenue
+            ).order_by(date_column, table.model, table.id).all()
+            streams.append([
+                RevenueItem(
+                    date=row_date,
+                    model=model,
+                    process=process,
+                    record_type=record_type,
+                    quantity=quantity,
+                    revenue=revenue
+                )
+                for row_date, model, process, quantity, revenue in rows
+            ])
+
+        return list(heapq.merge(*streams, key=lambda x: (x.date, x.model)))
+
+
+report_service = ReportService()
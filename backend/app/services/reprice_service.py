@@ -0,0 +1,131 @@
+from datetime import date
+from typing import Dict, Optional
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session
+
+from app.models.actual_models import ActualRecord, ForecastSnapshot
+from app.services.price_service import price_service
+from app.services.snapshot_catalog_service import snapshot_catalog_service
+from app.services.summary_service import summary_service
+
+# 임시 단가 테이블 insert 1회당 행 수
+REPRICE_CHUNK_SIZE = 1000
+
+
+class RepriceService:
+    """단가 변경 후 기간 내 매출 일괄 재계산
+
+    행마다 단가를 조회하지 않고, 기간 내 고유 (날짜, 모델, 공정) 키의 시점 단가만 계산해
+    임시 테이블에 올린 뒤 UPDATE ... FROM 한 번으로 반영한다.
+    - 실적: 입력 시와 같이 모델 기본 단가 기준 (공정 무시)
+    - forecast: 모든 업로드 스냅샷의 (forecast_date, model, process) 기준
+    단가가 없는 키는 기존 값을 유지한다.
+    """
+
+    def reprice(
+        self,
+        db: Session,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> Dict[str, int]:
+        """기간 내 실적/forecast 매출 재계산 후 일간 요약 갱신"""
+        actual_updated = self._reprice_actual(db, start_date, end_date)
+        forecast_updated = self._reprice_forecast(db, start_date, end_date)
+
+        summary_service.refresh_actual(db, start_date, end_date)
+        summary_service.refresh_forecast(db)
+        if forecast_updated:
+            # 업로드별 매출 합계 갱신
+            snapshot_catalog_service.refresh(db)
+        db.commit()
+        snapshot_catalog_service.invalidate()
+
+        return {"actual_updated": actual_updated, "forecast_updated": forecast_updated}
+
+    def _reprice_actual(self, db: Session, start_date: Optional[date], end_date: Optional[date]) -> int:
+        """실적 매출 재계산"""
+        query = db.query(ActualRecord.date, ActualRecord.model).distinct()
+        if start_date:
+            query = query.filter(ActualRecord.date >= start_date)
+        if end_date:
+            query = query.filter(ActualRecord.date <= end_date)
+        keys = query.all()
+
+        prices = price_service.prices_at((model, "", day) for day, model in keys)
+        rows = [
+            {"date": day.isoformat(), "model": model, "process": "", "unit_price": price}
+            for (day, model), price in zip(keys, prices)
+            if price is not None
+        ]
+        if not rows:
+            return 0
+
+        self._load_prices(db, rows)
+        result = db.execute(text("""
+            UPDATE actual_records
+            SET unit_price = p.unit_price,
+                revenue = p.unit_price * actual_records.quantity,
+                updated_at = CURRENT_TIMESTAMP
+            FROM tmp_reprice_prices p
+            WHERE actual_records.date = p.date
+              AND actual_records.model = p.model
+              AND (actual_records.unit_price != p.unit_price
+                   OR actual_records.revenue != p.unit_price * actual_records.quantity)
+        """))
+        db.execute(text("DROP TABLE tmp_reprice_prices"))
+        return result.rowcount
+
+    def _reprice_forecast(self, db: Session, start_date: Optional[date], end_date: Optional[date]) -> int:
+        """forecast 스냅샷 매출 재계산"""
+        process = func.coalesce(ForecastSnapshot.process, "")
+        query = db.query(ForecastSnapshot.forecast_date, ForecastSnapshot.model, process).distinct()
+        if start_date:
+            query = query.filter(ForecastSnapshot.forecast_date >= start_date)
+        if end_date:
+            query = query.filter(ForecastSnapshot.forecast_date <= end_date)
+        keys = query.all()
+
+        prices = price_service.prices_at((model, proc, day) for day, model, proc in keys)
+        rows = [
+            {"date": day.isoformat(), "model": model, "process": proc, "unit_price": price}
+            for (day, model, proc), price in zip(keys, prices)
+            if price is not None
+        ]
+        if not rows:
+            return 0
+
+        self._load_prices(db, rows)
+        result = db.execute(text("""
+            UPDATE forecast_snapshots
+            SET revenue = p.unit_price * forecast_snapshots.quantity,
+                updated_at = CURRENT_TIMESTAMP
+            FROM tmp_reprice_prices p
+            WHERE forecast_snapshots.forecast_date = p.date
+              AND forecast_snapshots.model = p.model
+              AND coalesce(forecast_snapshots.process, '') = p.process
+              AND forecast_snapshots.revenue != p.unit_price * forecast_snapshots.quantity
+        """))
+        db.execute(text("DROP TABLE tmp_reprice_prices"))
+        return result.rowcount
+
+    def _load_prices(self, db: Session, rows: list):
+        """시점 단가를 세션 연결의 임시 테이블에 적재"""
+        db.execute(text("DROP TABLE IF EXISTS tmp_reprice_prices"))
+        db.execute(text("""
+            CREATE TEMP TABLE tmp_reprice_prices (
+                date TEXT NOT NULL,
+                model TEXT NOT NULL,
+                process TEXT NOT NULL,
+                unit_price REAL NOT NULL,
+                PRIMARY KEY (date, model, process)
+            )
+        """))
+        insert_sql = text("""
+            INSERT INTO tmp_reprice_prices (date, model, process, unit_price)
+            VALUES (:date, :model, :process, :unit_price)
+        """)
+        for start in range(0, len(rows), REPRICE_CHUNK_SIZE):
+            db.execute(insert_sql, rows[start:start + REPRICE_CHUNK_SIZE])
+
+
+reprice_service = RepriceService()
@@ -0,0 +1,92 @@
+from datetime import date
+from typing import List, Optional
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from app.models.actual_models import ForecastSnapshot, ForecastUpload
+
+# 최신 업로드 날짜 캐시가 비어 있음을 나타내는 값 (None 은 "업로드 없음")
+_UNSET = object()
+
+
+class SnapshotCatalogService:
+    """Forecast 업로드 카탈로그 (forecast_uploads) 관리
+
+    업로드 날짜별 행 수, forecast 기간, 수량/매출 합계, 원본 파일 해시를 한 행으로 유지한다.
+    "최신 forecast" 는 스냅샷 테이블 전체의 max(upload_date) 대신 카탈로그에서 찾고,
+    결과는 프로세스 메모리에 캐시한다.
+    refresh 는 호출한 쪽의 트랜잭션 안에서 실행되며, 호출한 쪽은 commit 후 invalidate 한다.
+    """
+
+    def __init__(self):
+        self._latest = _UNSET
+        # invalidate 횟수 - 조회 도중 변경이 commit 되면 이전 값을 캐시하지 않도록 확인
+        self._version = 0
+
+    def refresh(self, db: Session, upload_date: Optional[date] = None, source_hash: Optional[str] = None):
+        """업로드 날짜의 카탈로그 행을 스냅샷에서 다시 계산 (날짜 없으면 전체)"""
+        rows = select(
+            ForecastSnapshot.upload_date,
+            func.count(ForecastSnapshot.id),
+            func.min(ForecastSnapshot.forecast_date),
+            func.max(ForecastSnapshot.forecast_date),
+            func.coalesce(func.sum(ForecastSnapshot.quantity), 0),
+            func.coalesce(func.sum(ForecastSnapshot.revenue), 0)
+        ).group_by(ForecastSnapshot.upload_date)
+        if upload_date is not None:
+            rows = rows.where(ForecastSnapshot.upload_date == upload_date)
+        else:
+            # 스냅샷이 없는 업로드 행 정리
+            db.query(ForecastUpload).filter(
+                ForecastUpload.upload_date.notin_(select(ForecastSnapshot.upload_date).distinct())
+            ).delete(synchronize_session=False)
+
+        stmt = insert(ForecastUpload).from_select(
+            ["upload_date", "row_count", "first_forecast_date", "last_forecast_date",
+             "total_quantity", "total_revenue"],
+            rows
+        )
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=["upload_date"],
+            set_={
+                "row_count": stmt.excluded.row_count,
+                "first_forecast_date": stmt.excluded.first_forecast_date,
+                "last_forecast_date": stmt.excluded.last_forecast_date,
+                "total_quantity": stmt.excluded.total_quantity,
+                "total_revenue": stmt.excluded.total_revenue,
+                "updated_at": func.now()
+            }
+        ))
+
+        if upload_date is not None and source_hash:
+            db.execute(
+                update(ForecastUpload)
+                .where(ForecastUpload.upload_date == upload_date)
+                .values(source_hash=source_hash)
+            )
+        self.invalidate()
+
+    def invalidate(self):
+        """최신 업로드 캐시 비우기 (카탈로그 변경 commit 후 호출)"""
+        self._version += 1
+        self._latest = _UNSET
+
+    def latest_upload(self, db: Session, cached: bool = True) -> Optional[date]:
+        """최신 업로드 날짜 (cached=False 면 현재 트랜잭션 기준으로 조회하고 캐시하지 않음)"""
+        latest = self._latest
+        if cached and latest is not _UNSET:
+            return latest
+
+        version = self._version
+        latest = db.query(func.max(ForecastUpload.upload_date)).scalar()
+        if cached and version == self._version:
+            self._latest = latest
+        return latest
+
+    def get_uploads(self, db: Session) -> List[ForecastUpload]:
+        """업로드 카탈로그 (최신순)"""
+        return db.query(ForecastUpload).order_by(ForecastUpload.upload_date.desc()).all()
+
+
+snapshot_catalog_service = SnapshotCatalogService()
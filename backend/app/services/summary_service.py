@@ -0,0 +1,261 @@
+from collections import defaultdict
+from datetime import date
+from typing import Iterable, Optional, Tuple
+from sqlalchemy import func, literal, literal_column, select, update
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from app.models.actual_models import (
+    ActualRecord, ForecastSnapshot, DailySummary, DailyModelSummary
+)
+from app.services.snapshot_catalog_service import snapshot_catalog_service
+
+# (date, model, process, quantity, revenue, record_count) - 삭제/수정 전 값은 음수로 전달
+ActualChange = Tuple[date, str, str, int, float, int]
+
+
+class SummaryService:
+    """일간 요약 롤업 관리 (daily_summary, daily_model_summary)
+
+    - 실적: 입력/수정/삭제 시 변경분(delta)만 더한다.
+    - forecast: 최신 업로드 스냅샷 기준이므로 저장 시 forecast 열만 다시 채운다.
+    - 단가 재계산 등 일괄 변경 후에는 기간 단위로 다시 계산한다 (refresh_actual).
+    호출한 쪽의 트랜잭션 안에서 실행되며 commit 은 호출한 쪽에서 한다.
+    """
+
+    def actual_change(self, record: ActualRecord, sign: int = 1) -> ActualChange:
+        """실적 레코드의 롤업 변경분 (sign=-1: 기존 값 차감)"""
+        return (
+            record.date,
+            record.model,
+            record.process or "",
+            sign * record.quantity,
+            sign * record.revenue,
+            sign
+        )
+
+    def apply_actual_changes(self, db: Session, changes: Iterable[ActualChange]):
+        """실적 변경분을 모델/공정별, 일별 요약에 반영"""
+        by_model = defaultdict(lambda: [0, 0.0, 0])
+        by_date = defaultdict(lambda: [0, 0.0, 0])
+        for day, model, process, quantity, revenue, count in changes:
+            for totals in (by_model[(day, model, process)], by_date[day]):
+                totals[0] += quantity
+                totals[1] += revenue
+                totals[2] += count
+
+        if not by_model:
+            return
+
+        # ORM bulk insert 를 거치지 않고 Core executemany 로 실행
+        stmt = insert(DailyModelSummary)
+        db.connection().execute(
+            stmt.on_conflict_do_update(
+                index_elements=["date", "model", "process"],
+                set_={
+                    "actual_qty": DailyModelSummary.actual_qty + stmt.excluded.actual_qty,
+                    "actual_revenue": DailyModelSummary.actual_revenue + stmt.excluded.actual_revenue,
+                    "actual_record_count": DailyModelSummary.actual_record_count + stmt.excluded.actual_record_count
+                }
+            ),
+            [
+                {
+                    "date": day, "model": model, "process": process,
+                    "actual_qty": qty, "actual_revenue": revenue, "actual_record_count": count,
+                    "forecast_qty": 0, "forecast_revenue": 0
+                }
+                for (day, model, process), (qty, revenue, count) in by_model.items()
+            ]
+        )
+
+        stmt = insert(DailySummary)
+        db.connection().execute(
+            stmt.on_conflict_do_update(
+                index_elements=["date"],
+                set_={
+                    "total_actual_qty": DailySummary.total_actual_qty + stmt.excluded.total_actual_qty,
+                    "total_actual_revenue": DailySummary.total_actual_revenue + stmt.excluded.total_actual_revenue,
+                    "actual_record_count": DailySummary.actual_record_count + stmt.excluded.actual_record_count
+                }
+            ),
+            [
+                {
+                    "date": day,
+                    "total_actual_qty": qty, "total_actual_revenue": revenue, "actual_record_count": count,
+                    "total_forecast_qty": 0, "total_forecast_revenue": 0
+                }
+                for day, (qty, revenue, count) in by_date.items()
+            ]
+        )
+
+    def refresh_forecast(self, db: Session, latest_upload: Optional[date] = None):
+        """forecast 열을 최신 업로드 스냅샷 기준으로 다시 채움"""
+        if latest_upload is None:
+            # 아직 commit 전일 수 있으므로 캐시가 아닌 현재 트랜잭션 기준으로 조회
+            latest_upload = snapshot_catalog_service.latest_upload(db, cached=False)
+
+        # 이전 최신 업로드 값 초기화 (forecast 값이 있는 행만)
+        db.execute(
+            update(DailyModelSummary)
+            .where((DailyModelSummary.forecast_qty != 0) | (DailyModelSummary.forecast_revenue != 0))
+            .values(forecast_qty=0, forecast_revenue=0)
+        )
+        db.execute(
+            update(DailySummary)
+            .where((DailySummary.total_forecast_qty != 0) | (DailySummary.total_forecast_revenue != 0))
+            .values(total_forecast_qty=0, total_forecast_revenue=0)
+        )
+
+        if latest_upload is None:
+            return
+
+        process = func.coalesce(ForecastSnapshot.process, literal_column("''"))
+        model_rows = (
+            select(
+                ForecastSnapshot.forecast_date,
+                ForecastSnapshot.model,
+                process,
+                literal(0), literal(0), literal(0),
+                func.sum(ForecastSnapshot.quantity),
+                func.sum(ForecastSnapshot.revenue)
+            )
+            .where(ForecastSnapshot.upload_date == latest_upload)
+            .group_by(ForecastSnapshot.forecast_date, ForecastSnapshot.model, process)
+        )
+        stmt = insert(DailyModelSummary).from_select(
+            ["date", "model", "process", "actual_qty", "actual_revenue", "actual_record_count",
+             "forecast_qty", "forecast_revenue"],
+            model_rows
+        )
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=["date", "model", "process"],
+            set_={
+                "forecast_qty": stmt.excluded.forecast_qty,
+                "forecast_revenue": stmt.excluded.forecast_revenue
+            }
+        ))
+
+        date_rows = (
+            select(
+                ForecastSnapshot.forecast_date,
+                literal(0), literal(0), literal(0),
+                func.sum(ForecastSnapshot.quantity),
+                func.sum(ForecastSnapshot.revenue)
+            )
+            .where(ForecastSnapshot.upload_date == latest_upload)
+            .group_by(ForecastSnapshot.forecast_date)
+        )
+        stmt = insert(DailySummary).from_select(
+            ["date", "total_actual_qty", "total_actual_revenue", "actual_record_count",
+             "total_forecast_qty", "total_forecast_revenue"],
+            date_rows
+        )
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=["date"],
+            set_={
+                "total_forecast_qty": stmt.excluded.total_forecast_qty,
+                "total_forecast_revenue": stmt.excluded.total_forecast_revenue
+            }
+        ))
+
+    def refresh_actual(self, db: Session, start_date: Optional[date] = None, end_date: Optional[date] = None):
+        """기간 내 실적 열을 원본 실적에서 다시 계산 (기간 없으면 전체)"""
+        def in_range(column):
+            conditions = []
+            if start_date:
+                conditions.append(column >= start_date)
+            if end_date:
+                conditions.append(column <= end_date)
+            return conditions
+
+        db.execute(
+            update(DailyModelSummary)
+            .where(*in_range(DailyModelSummary.date))
+            .values(actual_qty=0, actual_revenue=0, actual_record_count=0)
+        )
+        db.execute(
+            update(DailySummary)
+            .where(*in_range(DailySummary.date))
+            .values(total_actual_qty=0, total_actual_revenue=0, actual_record_count=0)
+        )
+
+        process = func.coalesce(ActualRecord.process, literal_column("''"))
+        model_rows = (
+            select(
+                ActualRecord.date,
+                ActualRecord.model,
+                process,
+                func.sum(ActualRecord.quantity),
+                func.sum(ActualRecord.revenue),
+                func.count(ActualRecord.id),
+                literal(0), literal(0)
+            )
+            .where(*in_range(ActualRecord.date))
+            .group_by(ActualRecord.date, ActualRecord.model, process)
+        )
+        stmt = insert(DailyModelSummary).from_select(
+            ["date", "model", "process", "actual_qty", "actual_revenue", "actual_record_count",
+             "forecast_qty", "forecast_revenue"],
+            model_rows
+        )
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=["date", "model", "process"],
+            set_={
+                "actual_qty": stmt.excluded.actual_qty,
+                "actual_revenue": stmt.excluded.actual_revenue,
+                "actual_record_count": stmt.excluded.actual_record_count
+            }
+        ))
+
+        date_rows = (
+            select(
+                ActualRecord.date,
+                func.sum(ActualRecord.quantity),
+                func.sum(ActualRecord.revenue),
+                func.count(ActualRecord.id),
+                literal(0), literal(0)
+            )
+            .where(*in_range(ActualRecord.date))
+            .group_by(ActualRecord.date)
+        )
+        stmt = insert(DailySummary).from_select(
+            ["date", "total_actual_qty", "total_actual_revenue", "actual_record_count",
+             "total_forecast_qty", "total_forecast_revenue"],
+            date_rows
+        )
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=["date"],
+            set_={
+                "total_actual_qty": stmt.excluded.total_actual_qty,
+                "total_actual_revenue": stmt.excluded.total_actual_revenue,
+                "actual_record_count": stmt.excluded.actual_record_count
+            }
+        ))
+
+    def rebuild(self, db: Session) -> int:
+        """원본 테이블에서 요약 전체 재생성 - 생성된 일자 수 반환"""
+        db.query(DailyModelSummary).delete(synchronize_session=False)
+        db.query(DailySummary).delete(synchronize_session=False)
+
+        snapshot_catalog_service.refresh(db)
+        self.refresh_actual(db)
+        self.refresh_forecast(db)
+
+        db.commit()
+        snapshot_catalog_service.invalidate()
+        return db.query(func.count(DailySummary.date)).scalar() or 0
+
+    def ensure_built(self, db: Session) -> bool:
+        """요약이 비어 있고 원본 데이터가 있으면 재생성 (기존 DB 최초 기동 시)"""
+        if db.query(DailySummary.date).first() is not None:
+            return False
+        if (
+            db.query(ActualRecord.id).first() is None
+            and db.query(ForecastSnapshot.id).first() is None
+        ):
+            return False
+        self.rebuild(db)
+        return True
+
+
+summary_service = SummaryService()
@@ -0,0 +1,140 @@
+import threading
+import zlib
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+
+import numpy as np
+
+# MinHash 해시 함수 (a*x + b) mod p 의 소수 - 곱이 uint64 를 넘지 않도록 31비트
+_PRIME = (1 << 31) - 1
+# 프로세스가 달라도 같은 시그니처가 나오도록 고정 시드
+_SEED = 20240601
+
+
+def feature_tokens(features: Dict) -> FrozenSet[str]:
+    """구조 특징 → MinHash 토큰 집합
+
+    헤더는 위치 포함/미포함 토큰을 함께 넣어 열이 조금 밀린 레이아웃도 겹치게 하고,
+    타입 그리드는 행 단위, 크기는 범위 버킷 + 열 수로 토큰화한다.
+    """
+    tokens: Set[str] = set()
+
+    for row_num, row in enumerate(features.get("header_tokens") or []):
+        for col_num, token in enumerate(row):
+            if token:
+                tokens.add(f"h{row_num}:{col_num}:{token}")
+                tokens.add(f"h:{token}")
+
+    for row_num, row_types in enumerate(features.get("type_grid") or []):
+        tokens.add(f"t{row_num}:{row_types}")
+
+    for keyword in features.get("keywords") or []:
+        tokens.add(f"k:{keyword}")
+
+    dimensions = features.get("dimensions")
+    if dimensions:
+        max_row, max_col = dimensions
+        tokens.add(f"r:{_range_bucket(max_row)}")
+        tokens.add(f"c:{_range_bucket(max_col)}")
+        tokens.add(f"cols:{max_col}")
+
+    return frozenset(tokens)
+
+
+def _range_bucket(value: int) -> str:
+    """행/열 수 범위 버킷 (핑거프린트와 같은 구간)"""
+    if value <= 10:
+        return "small"
+    elif value <= 50:
+        return "medium"
+    elif value <= 200:
+        return "large"
+    return "xlarge"
+
+
+class TemplateIndex:
+    """템플릿 구조 특징 MinHash-LSH 인덱스 (template_id → 토큰 집합)
+
+    시그니처를 band 로 나눠 버킷에 넣고, 조회 시 같은 버킷에 걸린 템플릿만 후보로 모아
+    실제 토큰 Jaccard 로 순위를 매긴다. 전체 템플릿을 훑지 않으므로 조회 비용은
+    템플릿 수가 아니라 후보 수에 비례한다.
+    band 16 x row 4 기준 Jaccard 0.7 인 템플릿이 후보에 들 확률은 약 99%, 0.3 은 약 12% 이다.
+    """
+
+    def __init__(self, num_perm: int = 64, bands: int = 16):
+        if num_perm % bands:
+            raise ValueError("num_perm 은 bands 의 배수여야 합니다")
+        rng = np.random.default_rng(_SEED)
+        self._a = rng.integers(1, _PRIME, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _PRIME, num_perm, dtype=np.uint64)
+        self._bands = bands
+        self._buckets: Dict[Tuple[int, bytes], Set[int]] = {}
+        self._tokens: Dict[int, FrozenSet[str]] = {}
+        self._keys: Dict[int, List[Tuple[int, bytes]]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._tokens)
+
+    def __contains__(self, template_id: int) -> bool:
+        return template_id in self._tokens
+
+    def _band_keys(self, tokens: FrozenSet[str]) -> List[Tuple[int, bytes]]:
+        """토큰 집합의 MinHash 시그니처 → band 버킷 키"""
+        hashes = np.fromiter(
+            (zlib.crc32(token.encode()) for token in tokens), dtype=np.uint64, count=len(tokens)
+        ) % _PRIME
+        signature = ((np.outer(self._a, hashes) + self._b[:, None]) % _PRIME).min(axis=1)
+        return [(band, chunk.tobytes()) for band, chunk in enumerate(np.split(signature, self._bands))]
+
+    def add(self, template_id: int, features: Optional[Dict]) -> bool:
+        """템플릿 추가/교체 (특징이 없으면 추가하지 않음)"""
+        tokens = feature_tokens(features or {})
+        if not tokens:
+            self.remove(template_id)
+            return False
+
+        keys = self._band_keys(tokens)
+        with self._lock:
+            self._remove_locked(template_id)
+            self._tokens[template_id] = tokens
+            self._keys[template_id] = keys
+            for key in keys:
+                self._buckets.setdefault(key, set()).add(template_id)
+        return True
+
+    def remove(self, template_id: int) -> bool:
+        """템플릿 제거"""
+        with self._lock:
+            return self._remove_locked(template_id)
+
+    def _remove_locked(self, template_id: int) -> bool:
+        keys = self._keys.pop(template_id, None)
+        if keys is None:
+            return False
+        del self._tokens[template_id]
+        for key in keys:
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(template_id)
+                if not bucket:
+                    del self._buckets[key]
+        return True
+
+    def query(self, features: Dict, limit: Optional[int] = None) -> List[Tuple[int, float]]:
+        """구조가 비슷한 템플릿 후보 [(template_id, Jaccard 0-1)] (유사도 내림차순)"""
+        tokens = feature_tokens(features)
+        if not tokens:
+            return []
+
+        keys = self._band_keys(tokens)
+        with self._lock:
+            candidates: Set[int] = set()
+            for key in keys:
+                candidates.update(self._buckets.get(key, ()))
+            scored = [
+                (template_id, len(tokens & self._tokens[template_id]) / len(tokens | self._tokens[template_id]))
+                for template_id in candidates
+            ]
+
+        scored.sort(key=lambda item: (-item[1], item[0]))
+        return scored[:limit] if limit else scored
@@ -1,23 +1,71 @@
+import threading
+from sqlalchemy import insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 from typing import Dict, List, Any, Optional, Tuple
-from datetime import date
+from datetime import date, datetime, timezone
 
+from app.core.database import TemplateSessionLocal
 from app.models.template_models import ExcelTemplate, TemplateUsage, LearningMetrics
 from app.services.fingerprint_service import fingerprint_service
+from app.services.template_index import TemplateIndex
 from app.services.excel_service import excel_service
+from app.services.workbook_context import WorkbookSource
 from app.core.config import settings
 
+# LSH 후보 중 상세 유사도를 계산할 최대 템플릿 수 (토큰 Jaccard 상위)
+MAX_TEMPLATE_CANDIDATES = 20
+
 
 class TemplateService:
-    """템플릿 학습 및 매칭 서비스"""
+    """템플릿 학습 및 매칭 서비스
+
+    유사 템플릿 검색은 템플릿별 구조 특징(features)으로 만든 MinHash-LSH 인덱스를 사용한다.
+    인덱스는 첫 매칭 시 DB 에서 한 번 만들고, 템플릿 생성/삭제 시 갱신한다.
+    활성 여부는 인덱스에 두지 않고 후보 조회 시 DB 에서 확인한다.
+
+    사용 기록/일간 지표는 업로드마다 커밋하지 않고 메모리 버퍼에 모아 두었다가
+    flush() 가 한 트랜잭션으로 기록한다 (write-behind).
+    기록 스레드가 TEMPLATE_METRICS_FLUSH_INTERVAL 마다, 또는 버퍼가
+    TEMPLATE_METRICS_FLUSH_SIZE 건에 도달하면 flush 하고, 종료 시 남은 버퍼를 비운다.
+    """
+
+    def __init__(self):
+        self._index: Optional[TemplateIndex] = None
+        self._index_lock = threading.Lock()
+
+        # write-behind 버퍼 (사용 로그, 템플릿별 성공 여부 순서, 날짜별 지표 증분)
+        self._pending_usage: List[Dict[str, Any]] = []
+        self._pending_outcomes: Dict[int, List[bool]] = {}
+        self._pending_metrics: Dict[date, Dict[str, float]] = {}
+        self._pending_count = 0
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flush_event = threading.Event()
+        self._stop_event = threading.Event()
+        self._writer: Optional[threading.Thread] = None
+
+    def _get_index(self, db: Session) -> TemplateIndex:
+        """템플릿 인덱스 (없으면 저장된 특징으로 생성)"""
+        if self._index is None:
+            with self._index_lock:
+                if self._index is None:
+                    index = TemplateIndex()
+                    skipped = 0
+                    for template_id, features in db.query(ExcelTemplate.id, ExcelTemplate.features):
+                        if not index.add(template_id, features):
+                            skipped += 1
+                    self._index = index
+                    print(f"[INFO] Template index built: {len(index)} templates ({skipped} without features)")
+        return self._index
 
     def find_matching_template(
         self,
         db: Session,
-        file_path: str
+        source: WorkbookSource
     ) -> Tuple[Optional[ExcelTemplate], float]:
         """업로드된 파일과 매칭되는 템플릿 찾기"""
-        fingerprint = fingerprint_service.generate_fingerprint(file_path)
+        fingerprint, features = fingerprint_service.analyze(source)
 
         # 정확한 핑거프린트 매칭
         exact_match = db.query(ExcelTemplate).filter(
@@ -28,22 +76,25 @@ class TemplateService:
         if exact_match:
             return exact_match, 100.0
 
-        # 유사 템플릿 검색
-        all_templates = db.query(ExcelTemplate).filter(
-            ExcelTemplate.is_active == True
-        ).all()
+        # 유사 템플릿 검색: LSH 후보만 저장된 특징으로 상세 유사도 일괄 계산
+        candidate_ids = [
+            template_id
+            for template_id, _ in self._get_index(db).query(features, limit=MAX_TEMPLATE_CANDIDATES)
+        ]
+        if not candidate_ids:
+            return None, 0.0
 
-        best_match = None
-        best_score = 0.0
+        candidates = db.query(ExcelTemplate).filter(
+            ExcelTemplate.id.in_(candidate_ids),
+            ExcelTemplate.is_active == True
+        ).order_by(ExcelTemplate.id).all()
+        if not candidates:
+            return None, 0.0
 
-        for template in all_templates:
-            score = fingerprint_service.calculate_similarity(
-                fingerprint,
-                template.fingerprint
-            )
-            if score > best_score:
-                best_score = score
-                best_match = template
+        scores = fingerprint_service.detailed_similarities(
+            features, [template.features for template in candidates]
+        )
+        best_score, best_match = max(zip(scores, candidates), key=lambda item: item[0])
 
         if best_score >= settings.TEMPLATE_MIN_CONFIDENCE * 100:
             return best_match, best_score
@@ -54,16 +105,17 @@ class TemplateService:
         self,
         db: Session,
         name: str,
-        file_path: str,
+        source: WorkbookSource,
         mapping: Dict[str, Any]
     ) -> ExcelTemplate:
         """새 템플릿 생성"""
-        fingerprint = fingerprint_service.generate_fingerprint(file_path)
+        fingerprint, features = fingerprint_service.analyze(source)
 
         template = ExcelTemplate(
             name=name,
             fingerprint=fingerprint,
             mapping=mapping,
+            features=features,
             accuracy_rate=1.0,
             use_count=0,
             is_active=True
@@ -73,6 +125,9 @@ class TemplateService:
         db.commit()
         db.refresh(template)
 
+        if self._index is not None:
+            self._index.add(template.id, features)
+
         return template
 
     def get_all_templates(self, db: Session) -> List[ExcelTemplate]:
@@ -119,6 +174,9 @@ class TemplateService:
 
         db.delete(template)
         db.commit()
+
+        if self._index is not None:
+            self._index.remove(template_id)
         return True
 
     def record_usage(
@@ -129,35 +187,18 @@ class TemplateService:
         was_successful: bool,
         processing_time_ms: int
     ):
-        """템플릿 사용 기록"""
-        usage = TemplateUsage(
-            template_id=template_id,
-            match_score=match_score,
-            was_successful=was_successful,
-            processing_time_ms=processing_time_ms
-        )
-        db.add(usage)
-
-        # 템플릿 통계 업데이트
-        template = self.get_template(db, template_id)
-        if template:
-            template.use_count += 1
-
-            # 정확도 업데이트 (이동 평균)
-            if was_successful:
-                template.accuracy_rate = (
-                    template.accuracy_rate * 0.9 + 1.0 * 0.1
-                )
-            else:
-                template.accuracy_rate = (
-                    template.accuracy_rate * 0.9 + 0.0 * 0.1
-                )
-
-            # 정확도 임계값 미달 시 비활성화
-            if template.accuracy_rate < settings.TEMPLATE_AUTO_DISABLE_THRESHOLD:
-                template.is_active = False
-
-        db.commit()
+        """템플릿 사용 기록 (버퍼에 추가, use_count/accuracy_rate 는 flush 시 반영)"""
+        with self._pending_lock:
+            self._pending_usage.append({
+                "template_id": template_id,
+                "match_score": match_score,
+                "was_successful": was_successful,
+                "processing_time_ms": processing_time_ms,
+                "created_at": datetime.now(timezone.utc).replace(tzinfo=None)
+            })
+            self._pending_outcomes.setdefault(template_id, []).append(was_successful)
+            self._pending_count += 1
+        self._on_buffered()
 
     def update_daily_metrics(
         self,
@@ -166,33 +207,151 @@ class TemplateService:
         llm_called: bool,
         cost_saved: float = 0.0
     ):
-        """일간 지표 업데이트"""
-        today = date.today()
-        metrics = db.query(LearningMetrics).filter(
-            LearningMetrics.date == today
-        ).first()
+        """일간 지표 업데이트 (버퍼에 증분 누적, flush 시 반영)"""
+        with self._pending_lock:
+            metrics = self._pending_metrics.setdefault(date.today(), {
+                "total_uploads": 0,
+                "template_hits": 0,
+                "llm_calls": 0,
+                "api_cost_saved": 0.0
+            })
+            metrics["total_uploads"] += 1
+            if template_hit:
+                metrics["template_hits"] += 1
+            if llm_called:
+                metrics["llm_calls"] += 1
+            metrics["api_cost_saved"] += cost_saved
+            self._pending_count += 1
+        self._on_buffered()
+
+    def _on_buffered(self):
+        """버퍼 추가 후 처리 - 기록 스레드가 없거나 간격이 0이면 바로 기록, 한도 도달 시 기록 스레드 깨우기"""
+        if self._writer is None or settings.TEMPLATE_METRICS_FLUSH_INTERVAL <= 0:
+            self.flush()
+        elif self._pending_count >= settings.TEMPLATE_METRICS_FLUSH_SIZE:
+            self._flush_event.set()
+
+    def flush(self) -> int:
+        """버퍼의 사용 기록/지표를 한 트랜잭션으로 기록 - 기록한 항목 수 반환
+
+        실패하면 꺼낸 항목을 버퍼에 되돌려 다음 flush 에서 다시 시도한다.
+        """
+        with self._flush_lock:
+            with self._pending_lock:
+                usage, self._pending_usage = self._pending_usage, []
+                outcomes, self._pending_outcomes = self._pending_outcomes, {}
+                metrics, self._pending_metrics = self._pending_metrics, {}
+                count, self._pending_count = self._pending_count, 0
+            if not count:
+                return 0
+
+            db = TemplateSessionLocal()
+            try:
+                if usage:
+                    db.execute(insert(TemplateUsage), usage)
+                self._apply_outcomes(db, outcomes)
+                self._apply_metrics(db, metrics)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                self._requeue(usage, outcomes, metrics, count)
+                print(f"[WARN] Template metrics flush failed: {e}")
+                return 0
+            finally:
+                db.close()
+
+        return count
+
+    def _apply_outcomes(self, db: Session, outcomes: Dict[int, List[bool]]):
+        """템플릿별 사용 횟수/정확도(이동 평균) 갱신 - 기록 순서대로 적용"""
+        if not outcomes:
+            return
+        templates = db.query(ExcelTemplate).filter(ExcelTemplate.id.in_(list(outcomes))).all()
+        for template in templates:
+            for was_successful in outcomes[template.id]:
+                template.use_count += 1
+
+                # 정확도 업데이트 (이동 평균)
+                template.accuracy_rate = (
+                    template.accuracy_rate * 0.9 + (1.0 if was_successful else 0.0) * 0.1
+                )
+
+                # 정확도 임계값 미달 시 비활성화
+                if template.accuracy_rate < settings.TEMPLATE_AUTO_DISABLE_THRESHOLD:
+                    template.is_active = False
 
+    def _apply_metrics(self, db: Session, metrics: Dict[date, Dict[str, float]]):
+        """날짜별 지표 증분 upsert"""
         if not metrics:
-            metrics = LearningMetrics(
-                date=today,
-                total_uploads=0,
-                template_hits=0,
-                llm_calls=0,
-                api_cost_saved=0.0
-            )
-            db.add(metrics)
-
-        metrics.total_uploads += 1
-        if template_hit:
-            metrics.template_hits += 1
-        if llm_called:
-            metrics.llm_calls += 1
-        metrics.api_cost_saved += cost_saved
+            return
+        stmt = sqlite_insert(LearningMetrics)
+        table = LearningMetrics.__table__
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["date"],
+                set_={
+                    name: table.c[name] + stmt.excluded[name]
+                    for name in ("total_uploads", "template_hits", "llm_calls", "api_cost_saved")
+                }
+            ),
+            [{"date": day, **values} for day, values in metrics.items()]
+        )
 
-        db.commit()
+    def _requeue(
+        self,
+        usage: List[Dict[str, Any]],
+        outcomes: Dict[int, List[bool]],
+        metrics: Dict[date, Dict[str, float]],
+        count: int
+    ):
+        """flush 실패 항목을 버퍼 앞쪽에 되돌리기"""
+        with self._pending_lock:
+            self._pending_count += count
+            self._pending_usage = usage + self._pending_usage
+            for template_id, values in self._pending_outcomes.items():
+                outcomes.setdefault(template_id, []).extend(values)
+            self._pending_outcomes = outcomes
+            for day, values in self._pending_metrics.items():
+                merged = metrics.setdefault(day, dict.fromkeys(values, 0))
+                for name, value in values.items():
+                    merged[name] += value
+            self._pending_metrics = metrics
+
+    def start_writer(self, interval: float = None):
+        """사용 기록/지표 기록 스레드 시작"""
+        if self._writer is not None:
+            return
+        self._stop_event.clear()
+        self._writer = threading.Thread(
+            target=self._write_behind,
+            args=(interval or settings.TEMPLATE_METRICS_FLUSH_INTERVAL,),
+            name="template-metrics-writer",
+            daemon=True
+        )
+        self._writer.start()
+
+    def stop_writer(self):
+        """기록 스레드 종료 후 남은 버퍼 기록"""
+        if self._writer is not None:
+            self._stop_event.set()
+            self._flush_event.set()
+            self._writer.join()
+            self._writer = None
+        self.flush()
+
+    def _write_behind(self, interval: float):
+        """간격마다 또는 버퍼 한도 도달 시 flush"""
+        while not self._stop_event.is_set():
+            self._flush_event.wait(interval)
+            self._flush_event.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[WARN] Template metrics writer error: {e}")
 
     def get_stats(self, db: Session) -> Dict[str, Any]:
-        """학습 통계 조회"""
+        """학습 통계 조회 (버퍼에 남은 지표를 먼저 기록)"""
+        self.flush()
         total_templates = db.query(ExcelTemplate).count()
         active_templates = db.query(ExcelTemplate).filter(
             ExcelTemplate.is_active == True
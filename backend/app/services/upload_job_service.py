@@ -0,0 +1,118 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Optional, Set
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import TemplateSessionLocal
+from app.core.executor import task_executor
+from app.models.job_models import UploadJob
+from app.services.upload_service import upload_service, StageTimer
+from app.services.workbook_context import WorkbookContext
+
+
+class UploadJobService:
+    """Forecast 업로드 백그라운드 작업 관리
+
+    업로드 요청은 작업 ID만 즉시 반환하고 분석은 워커에서 실행한다.
+    상태/단계별 소요 시간/결과는 templates.db 에 저장되므로 화면을 새로고침해도 조회할 수 있다.
+    """
+
+    def __init__(self):
+        # 실행 중인 asyncio 작업 참조 (GC 방지)
+        self._tasks: Set[asyncio.Task] = set()
+
+    def create(self, db: Session, filename: str, file_hash: str) -> UploadJob:
+        """작업 생성 (pending)"""
+        job = UploadJob(
+            id=uuid.uuid4().hex,
+            filename=filename,
+            file_hash=file_hash,
+            status="pending",
+            stage_timings={}
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        return job
+
+    def get(self, db: Session, job_id: str) -> Optional[UploadJob]:
+        """작업 조회"""
+        return db.query(UploadJob).filter(UploadJob.id == job_id).first()
+
+    def start(self, job_id: str, file_path: str, file_hash: str):
+        """작업을 워커에서 실행 (이벤트 루프 안에서 호출)"""
+        task = asyncio.create_task(
+            task_executor.run_io(self.run, job_id, file_path, file_hash)
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def run(self, job_id: str, file_path: str, file_hash: str):
+        """작업 실행 (워커 스레드) - 완료 후 임시 파일 삭제"""
+        # 진행 상황 기록용 세션은 분석 파이프라인 세션과 분리
+        job_db = TemplateSessionLocal()
+        db = TemplateSessionLocal()
+        workbook = WorkbookContext(file_path)
+
+        try:
+            job = self.get(job_db, job_id)
+            if not job:
+                return
+
+            job.status = "running"
+            job_db.commit()
+
+            def on_stage_change(stage: Optional[str], timings: dict):
+                job.stage = stage
+                job.stage_timings = timings
+                job_db.commit()
+
+            try:
+                response = upload_service.process(
+                    workbook, file_hash, db, timer=StageTimer(on_stage_change)
+                )
+                job.status = "completed"
+                job.result = response.model_dump(mode="json")
+            except Exception as e:
+                db.rollback()
+                print(f"[WARN] Upload job {job_id} failed: {e}")
+                job.status = "failed"
+                job.error = str(e)
+
+            job.stage = None
+            job.finished_at = func.now()
+            job_db.commit()
+        finally:
+            workbook.close()
+            db.close()
+            job_db.close()
+            Path(file_path).unlink(missing_ok=True)
+
+    def recover(self, db: Session) -> int:
+        """서버 시작 시 정리: 중단된 작업은 실패 처리, 보관 기간이 지난 작업은 삭제"""
+        interrupted = db.query(UploadJob).filter(
+            UploadJob.status.in_(["pending", "running"])
+        ).update({
+            UploadJob.status: "failed",
+            UploadJob.stage: None,
+            UploadJob.error: "서버 재시작으로 작업이 중단되었습니다",
+            UploadJob.finished_at: func.now()
+        }, synchronize_session=False)
+
+        # created_at 은 SQLite CURRENT_TIMESTAMP(UTC) 기준
+        expire_before = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(
+            days=settings.UPLOAD_JOB_RETENTION_DAYS
+        )
+        db.query(UploadJob).filter(
+            UploadJob.created_at < expire_before
+        ).delete(synchronize_session=False)
+
+        db.commit()
+        return interrupted
+
+
+upload_job_service = UploadJobService()
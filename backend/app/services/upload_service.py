@@ -0,0 +1,226 @@
+import time
+import hashlib
+import tempfile
+import traceback
+from contextlib import contextmanager
+from typing import BinaryIO, Callable, Dict, Optional, Tuple
+from sqlalchemy.orm import Session
+
+from app.models.schemas import ForecastUploadResponse, ForecastItem
+from app.services.template_service import template_service
+from app.services.excel_service import excel_service
+from app.services.llm_service import llm_service
+from app.services.workbook_context import WorkbookContext
+from app.services.parse_cache_service import parse_cache_service
+
+# 업로드 파일 임시 저장 시 읽기 단위 (1MB)
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+class InvalidExcelError(ValueError):
+    """업로드 파일을 Excel로 읽을 수 없는 경우"""
+
+
+class StageTimer:
+    """업로드 처리 단계별 소요 시간(ms) 기록
+
+    단계: detect(형식 감지), parse(파싱), fingerprint(템플릿 매칭), llm(LLM 분석/검증)
+    on_change 콜백은 단계 시작/종료 시 (현재 단계, 누적 소요 시간)으로 호출된다.
+    """
+
+    def __init__(self, on_change: Optional[Callable[[Optional[str], Dict[str, int]], None]] = None):
+        self.timings: Dict[str, int] = {}
+        self.current: Optional[str] = None
+        self._on_change = on_change
+
+    @contextmanager
+    def stage(self, name: str):
+        self.current = name
+        self._notify()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = int((time.perf_counter() - started) * 1000)
+            self.timings[name] = self.timings.get(name, 0) + elapsed
+            self.current = None
+            self._notify()
+
+    def _notify(self):
+        if self._on_change:
+            self._on_change(self.current, dict(self.timings))
+
+
+class UploadService:
+    """Forecast 업로드 분석 파이프라인 (CNC 고정 형식 → 템플릿 매칭 → LLM 순서)
+
+    파이프라인 전체가 I/O 스레드 풀 작업 하나에서 실행되며, 파싱/이미지 변환도
+    같은 WorkbookContext 를 재사용하도록 프로세스 풀로 넘기지 않는다.
+    (자식 프로세스는 파일 경로로 워크북을 다시 열어야 해 업로드 1건에 여러 번 로드된다)
+    """
+
+    def save_temp_file(self, fileobj: BinaryIO, suffix: str) -> Tuple[str, str]:
+        """업로드 파일을 임시 파일로 저장하고 (경로, SHA-256 해시) 반환"""
+        hasher = hashlib.sha256()
+        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+            while True:
+                chunk = fileobj.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                hasher.update(chunk)
+                tmp.write(chunk)
+            return tmp.name, hasher.hexdigest()
+
+    def process(
+        self,
+        workbook: WorkbookContext,
+        file_hash: str,
+        db: Session,
+        timer: Optional[StageTimer] = None
+    ) -> ForecastUploadResponse:
+        """업로드 처리 (파싱 캐시 확인 → 분석 → 캐시 저장)"""
+        timer = timer or StageTimer()
+
+        # 같은 파일 + 같은 파서/템플릿 버전이면 캐시된 결과 반환
+        cache_key = parse_cache_service.make_key(db, file_hash)
+        cached = parse_cache_service.get(db, cache_key)
+        if cached:
+            template_service.update_daily_metrics(
+                db, template_hit=cached.template_matched, llm_called=False
+            )
+            cached.file_hash = file_hash
+            return cached
+
+        response = self.analyze(workbook, db, timer)
+        response.file_hash = file_hash
+        parse_cache_service.put(db, cache_key, file_hash, response)
+        return response
+
+    def analyze(
+        self,
+        workbook: WorkbookContext,
+        db: Session,
+        timer: StageTimer
+    ) -> ForecastUploadResponse:
+        """Forecast 파일 분석"""
+        start_time = time.time()
+
+        # 0. CNC Forecast 고정 형식 감지 및 파싱 (우선 처리)
+        try:
+            with timer.stage("detect"):
+                is_cnc = excel_service.is_cnc_forecast_format(workbook)
+            print(f"[DEBUG] CNC format detected: {is_cnc}")
+
+            if is_cnc:
+                with timer.stage("parse"):
+                    result = excel_service.parse_cnc_forecast(workbook)
+                print(f"[DEBUG] CNC parse result: {len(result.get('data', []))} items")
+
+                processing_time = int((time.time() - start_time) * 1000)
+                template_service.update_daily_metrics(
+                    db, template_hit=True, llm_called=False, cost_saved=0.03
+                )
+
+                return ForecastUploadResponse(
+                    success=True,
+                    data=[ForecastItem(**item) for item in result["data"]],
+                    confidence=result["confidence"],
+                    notes=result["notes"],
+                    template_matched=True,
+                    template_name=result["template_name"]
+                )
+        except Exception as e:
+            # CNC 형식 감지/파싱 실패 시 다른 방법 시도
+            print(f"[WARN] CNC format check failed: {e}")
+            traceback.print_exc()
+
+        # 1. 템플릿 매칭 시도 (다른 형식인 경우)
+        try:
+            with timer.stage("fingerprint"):
+                matched_template, match_score = template_service.find_matching_template(db, workbook)
+        except Exception as e:
+            # 유효하지 않은 Excel 파일인 경우
+            raise InvalidExcelError(f"유효하지 않은 Excel 파일입니다: {str(e)}")
+
+        if matched_template and match_score >= 90:
+            # 템플릿으로 직접 파싱
+            with timer.stage("parse"):
+                data = excel_service.parse_with_mapping(workbook, matched_template.mapping)
+
+            # 사용 기록
+            processing_time = int((time.time() - start_time) * 1000)
+            template_service.record_usage(
+                db, matched_template.id, match_score, True, processing_time
+            )
+            template_service.update_daily_metrics(
+                db, template_hit=True, llm_called=False, cost_saved=0.02
+            )
+
+            return ForecastUploadResponse(
+                success=True,
+                data=[ForecastItem(**item) for item in data],
+                confidence=match_score / 100,
+                notes=f"템플릿 '{matched_template.name}' 사용",
+                template_matched=True,
+                template_name=matched_template.name
+            )
+
+        elif matched_template and match_score >= 70:
+            # 템플릿 + LLM 검증
+            with timer.stage("parse"):
+                data = excel_service.parse_with_mapping(workbook, matched_template.mapping)
+
+            # 이미지로 변환 후 LLM 검증
+            with timer.stage("llm"):
+                img_path = excel_service.excel_to_image(workbook)
+                verification = llm_service.verify_template_result(data, img_path)
+
+            if verification.get("is_valid", False):
+                processing_time = int((time.time() - start_time) * 1000)
+                template_service.record_usage(
+                    db, matched_template.id, match_score, True, processing_time
+                )
+                template_service.update_daily_metrics(
+                    db, template_hit=True, llm_called=True
+                )
+
+                return ForecastUploadResponse(
+                    success=True,
+                    data=[ForecastItem(**item) for item in data],
+                    confidence=verification.get("confidence", 0.8),
+                    notes="템플릿 + LLM 검증 완료",
+                    template_matched=True,
+                    template_name=matched_template.name
+                )
+            else:
+                # 검증 실패 - 전체 LLM 분석으로 폴백
+                corrections = verification.get("corrections", [])
+                if corrections:
+                    data = corrections
+
+        # 2. 전체 LLM 분석 (새 형식 또는 검증 실패)
+        with timer.stage("llm"):
+            img_path = excel_service.excel_to_image(workbook)
+            analysis_result = llm_service.analyze_excel_image(img_path)
+
+        template_service.update_daily_metrics(
+            db, template_hit=False, llm_called=True
+        )
+
+        return ForecastUploadResponse(
+            success=True,
+            data=[
+                ForecastItem(
+                    model=item["model"],
+                    period=item["period"],
+                    quantity=item["quantity"]
+                )
+                for item in analysis_result.get("data", [])
+            ],
+            confidence=analysis_result.get("confidence", 0.0),
+            notes=analysis_result.get("notes", "LLM 분석 완료 - 템플릿 저장을 권장합니다"),
+            template_matched=False
+        )
+
+
+upload_service = UploadService()
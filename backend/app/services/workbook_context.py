@@ -0,0 +1,138 @@
+import re
+import zipfile
+import openpyxl
+from typing import Any, Dict, Iterator, Optional, Union
+
+# 시트 XML 의 병합 셀 태그 (<mergeCells> 컨테이너 제외, 네임스페이스 접두어 허용)
+_MERGE_CELL_TAG = re.compile(rb'<(?:\w+:)?mergeCell[\s/>]')
+
+
+class WorkbookContext:
+    """업로드 1건 동안 공유하는 Excel 워크북 컨텍스트
+
+    같은 파일을 단계마다(형식 감지, 파싱, 핑거프린트, 이미지 변환) 다시 여는 대신
+    최초 접근 시 한 번만 load_workbook 하고 이후 단계는 로드된 워크북을 재사용한다.
+    순차 읽기만 필요한 단계는 iter_values()로 전체 로드 없이 스트리밍할 수 있다.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = str(file_path)
+        self._workbook = None
+
+    @classmethod
+    def of(cls, source: Union[str, "WorkbookContext"]) -> "WorkbookContext":
+        """파일 경로 또는 기존 컨텍스트를 컨텍스트로 변환"""
+        if isinstance(source, cls):
+            return source
+        return cls(source)
+
+    @property
+    def workbook(self):
+        """워크북 (최초 접근 시 한 번만 로드)"""
+        if self._workbook is None:
+            self._workbook = openpyxl.load_workbook(self.file_path, data_only=True)
+        return self._workbook
+
+    @property
+    def sheet(self):
+        """활성 시트"""
+        return self.workbook.active
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._workbook is not None
+
+    def iter_values(self, max_row: Optional[int] = None) -> Iterator[tuple]:
+        """활성 시트의 행 값 튜플을 위에서부터 순차 반환
+
+        워크북이 이미 로드되어 있으면 그대로 사용하고, 아니면 read_only 모드로 열어
+        셀 객체를 메모리에 올리지 않고 스트리밍한다.
+        """
+        if self._workbook is not None:
+            yield from self.sheet.iter_rows(max_row=max_row, values_only=True)
+            return
+
+        wb = openpyxl.load_workbook(self.file_path, read_only=True, data_only=True)
+        try:
+            yield from wb.active.iter_rows(max_row=max_row, values_only=True)
+        finally:
+            wb.close()
+
+    def read_window(self, max_row: int, max_col: int) -> Dict[str, Any]:
+        """활성 시트 좌상단 max_row x max_col 영역 값과 시트 크기, 병합 셀 수
+
+        워크북이 로드되어 있지 않으면 read_only 모드로 열어 영역 행까지만 파싱하므로
+        시트 전체 크기와 무관하게 비용이 일정하다. 크기는 시트의 dimension 정보를 사용하고,
+        병합 셀 수는 read_only 시트가 제공하지 않아 시트 XML 의 mergeCell 태그를 센다.
+        """
+        if self._workbook is not None:
+            sheet = self.sheet
+            rows = list(sheet.iter_rows(
+                max_row=min(max_row, sheet.max_row),
+                max_col=min(max_col, sheet.max_column),
+                values_only=True
+            ))
+            return {
+                "rows": rows,
+                "max_row": sheet.max_row,
+                "max_column": sheet.max_column,
+                "merged_cells_count": len(sheet.merged_cells.ranges),
+            }
+
+        wb = openpyxl.load_workbook(self.file_path, read_only=True, data_only=True)
+        try:
+            sheet = wb.active
+            if sheet.max_row is None or sheet.max_column is None:
+                # dimension 정보가 없는 파일은 한 번 훑어서 크기 계산
+                sheet.calculate_dimension(force=True)
+            sheet_rows = sheet.max_row or 0
+            sheet_cols = sheet.max_column or 0
+
+            rows = []
+            if sheet_rows and sheet_cols:
+                rows = list(sheet.iter_rows(
+                    max_row=min(max_row, sheet_rows),
+                    max_col=min(max_col, sheet_cols),
+                    values_only=True
+                ))
+            merged_cells_count = self._count_merged_cells(sheet._worksheet_path)
+        finally:
+            wb.close()
+
+        return {
+            "rows": rows,
+            "max_row": sheet_rows,
+            "max_column": sheet_cols,
+            "merged_cells_count": merged_cells_count,
+        }
+
+    def _count_merged_cells(self, worksheet_path: str) -> int:
+        """시트 XML 을 스트리밍하며 mergeCell 태그 수 세기 (태그가 청크 경계에 걸리지 않도록 마지막 '<' 부터 이월)"""
+        count = 0
+        tail = b""
+        with zipfile.ZipFile(self.file_path) as archive, archive.open(worksheet_path) as stream:
+            while True:
+                chunk = stream.read(1 << 20)
+                buffer = tail + chunk
+                if not chunk:
+                    return count + len(_MERGE_CELL_TAG.findall(buffer))
+                split = buffer.rfind(b"<")
+                if split <= 0:
+                    split = len(buffer)
+                count += len(_MERGE_CELL_TAG.findall(buffer, 0, split))
+                tail = buffer[split:]
+
+    def close(self):
+        """로드된 워크북 해제"""
+        if self._workbook is not None:
+            self._workbook.close()
+            self._workbook = None
+
+    def __enter__(self) -> "WorkbookContext":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+WorkbookSource = Union[str, WorkbookContext]
@@ -11,6 +11,7 @@ import os
 import sys
 import time
 import threading
+import multiprocessing
 import webbrowser
 import subprocess
 from pathlib import Path
@@ -129,4 +130,6 @@ def main():
 
 
 if __name__ == '__main__':
+    # 프로세스 풀(spawn) 자식 프로세스가 exe를 다시 실행하는 경우 처리
+    multiprocessing.freeze_support()
     main()
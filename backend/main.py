@@ -1,4 +1,5 @@
 import uvicorn
+import asyncio
 import sys
 import os
 from pathlib import Path
@@ -10,7 +11,10 @@ from contextlib import asynccontextmanager
 import traceback
 
 from app.core.config import settings
-from app.core.database import init_db
+from app.core.database import init_db, run_maintenance
+from app.core.executor import task_executor
+from app.services.price_service import price_service
+from app.services.template_service import template_service
 from app.api.routes import api_router
 
 # 실행 파일 기준 경로 결정 (PyInstaller 지원)
@@ -32,12 +36,66 @@ async def lifespan(app: FastAPI):
     """앱 시작/종료 시 실행"""
     # Startup
     init_db()
+    _recover_upload_jobs()
+    _ensure_summary()
+    price_service.load()
+    if settings.PRICE_RELOAD_ENABLED:
+        price_service.start_watcher()
+    if settings.TEMPLATE_METRICS_FLUSH_INTERVAL > 0:
+        template_service.start_writer()
+    maintenance = None
+    if settings.SQLITE_MAINTENANCE_INTERVAL > 0:
+        maintenance = asyncio.create_task(_run_db_maintenance(settings.SQLITE_MAINTENANCE_INTERVAL))
     print(f"[START] {settings.APP_NAME} v{settings.APP_VERSION}")
     yield
     # Shutdown
+    if maintenance:
+        maintenance.cancel()
+    task_executor.shutdown()
+    template_service.stop_writer()
+    price_service.stop_watcher()
+    price_service.flush()
+    run_maintenance()
     print(f"[STOP] {settings.APP_NAME}")
 
 
+async def _run_db_maintenance(interval: float):
+    """주기적으로 WAL 체크포인트/통계 갱신"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await task_executor.run_io(run_maintenance)
+        except Exception as e:
+            print(f"[WARN] DB maintenance failed: {e}")
+
+
+def _recover_upload_jobs():
+    """이전 실행에서 중단된 업로드 작업 정리"""
+    from app.core.database import TemplateSessionLocal
+    from app.services.upload_job_service import upload_job_service
+
+    db = TemplateSessionLocal()
+    try:
+        interrupted = upload_job_service.recover(db)
+        if interrupted:
+            print(f"[INFO] {interrupted} interrupted upload job(s) marked as failed")
+    finally:
+        db.close()
+
+
+def _ensure_summary():
+    """일간 요약 롤업이 비어 있으면 원본 데이터로 생성"""
+    from app.core.database import HistorySessionLocal
+    from app.services.summary_service import summary_service
+
+    db = HistorySessionLocal()
+    try:
+        if summary_service.ensure_built(db):
+            print("[INFO] Daily summary rebuilt from history")
+    finally:
+        db.close()
+
+
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
@@ -60,6 +118,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # API 라우터 등록
@@ -183,6 +242,10 @@ async def serve_spa(full_path: str):
 if __name__ == "__main__":
     import webbrowser
     import threading
+    import multiprocessing
+
+    # 프로세스 풀(spawn) 자식 프로세스가 exe를 다시 실행하는 경우 처리
+    multiprocessing.freeze_support()
 
     # 포터블 모드에서 브라우저 자동 열기
     if STATIC_MODE or getattr(sys, 'frozen', False):
@@ -0,0 +1,23 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.core.migrations import run_migrations, HISTORY_MIGRATIONS
+from app.models import actual_models, template_models, job_models, price_models  # noqa: F401 - 테이블 등록
+
+
+@pytest.fixture
+def history_engine(tmp_path):
+    """임시 history.db (init_db 와 같은 순서로 테이블 생성 + 마이그레이션)"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'history.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine, HISTORY_MIGRATIONS)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def history_session(history_engine):
+    """임시 history.db 세션 팩토리"""
+    return sessionmaker(autocommit=False, autoflush=False, bind=history_engine)
@@ -0,0 +1,68 @@
+import os
+
+import pandas as pd
+import pytest
+
+from app.models.price_models import PriceHistory
+from app.services import price_service as price_module
+from app.services.price_service import PRICE_HISTORY_START, PriceService
+
+
+@pytest.fixture
+def service(tmp_path, history_session, monkeypatch):
+    """임시 DB + 임시 price_master.xlsx 를 쓰는 단가 서비스"""
+    monkeypatch.setattr(price_module, "HistorySessionLocal", history_session)
+    pd.DataFrame(
+        {"모델": ["A", "B"], "공정": ["TRI", "TRI"], "단가($)": [1.0, 2.0]}
+    ).to_excel(tmp_path / "price_master.xlsx", index=False)
+
+    service = PriceService()
+    service.price_master_path = tmp_path / "price_master.xlsx"
+    service.load()
+    return service
+
+
+def _touch(path):
+    """외부 편집처럼 수정 시각만 변경"""
+    mtime = path.stat().st_mtime + 10
+    os.utime(path, (mtime, mtime))
+
+
+def _history(history_session, model):
+    db = history_session()
+    try:
+        return db.query(PriceHistory.effective_from, PriceHistory.unit_price).filter(
+            PriceHistory.model == model
+        ).order_by(PriceHistory.effective_from).all()
+    finally:
+        db.close()
+
+
+def test_api_price_survives_stale_xlsx_sync(service, history_session):
+    # API 로 추가/수정 (xlsx 에는 아직 기록 안 됨)
+    service.add_price("C", 3.0, "TRI")
+    service.add_price("A", 1.5, "TRI")
+
+    _touch(service.price_master_path)
+    service.sync_from_xlsx()
+
+    assert service.get_price("C", "TRI") == 3.0
+    assert service.get_price("A", "TRI") == 1.5
+    assert _history(history_session, "C") == [(PRICE_HISTORY_START, 3.0)]
+    assert len(_history(history_session, "A")) == 2
+    # 파일에 없는 단가가 남아 있으므로 다음 flush 때 다시 기록
+    assert service.flush()
+    assert set(pd.read_excel(service.price_master_path)["모델"]) == {"A", "B", "C"}
+
+
+def test_external_xlsx_edit_is_applied(service):
+    service.add_price("C", 3.0, "TRI")
+    pd.DataFrame(
+        {"모델": ["A", "B"], "공정": ["TRI", "TRI"], "단가($)": [1.0, 5.0]}
+    ).to_excel(service.price_master_path, index=False)
+
+    result = service.sync_from_xlsx()
+
+    assert result == {"updated": 1}
+    assert service.get_price("B", "TRI") == 5.0
+    assert service.get_price("C", "TRI") == 3.0
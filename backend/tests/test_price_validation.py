@@ -0,0 +1,29 @@
+import numpy as np
+import pandas as pd
+
+from app.services.price_validation import check_price_frame
+
+
+def _frame():
+    return pd.DataFrame({
+        "모델": ["A", "B", "C", "D"],
+        "공정": ["TRI", "TRI", "TRI", "TRI"],
+        "단가($)": [1.0, 0, np.nan, "x"],
+    })
+
+
+def test_import_keeps_non_positive_prices_and_reports_unstorable_rows():
+    valid, errors = check_price_frame(_frame(), strict=False)
+
+    assert list(valid.itertuples(index=False, name=None)) == [("A", "TRI", 1.0), ("B", "TRI", 0.0)]
+    assert [(e["row"], e["message"]) for e in errors] == [
+        (4, "단가가 비어있습니다"),
+        (5, "단가는 숫자여야 합니다"),
+    ]
+
+
+def test_upload_rejects_non_positive_prices():
+    valid, errors = check_price_frame(_frame(), strict=True)
+
+    assert list(valid["model"]) == ["A"]
+    assert [e["row"] for e in errors] == [3, 4, 5]
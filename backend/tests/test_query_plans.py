@@ -0,0 +1,171 @@
+"""
+주요 조회 쿼리 실행 계획 점검
+
+임시 history.db (create_all + 마이그레이션) 에서 서비스/라우트가 실제로 실행하는 문장을 가로채
+EXPLAIN QUERY PLAN 으로 기대한 인덱스를 쓰는지, 인덱스 없는 전체 테이블 스캔이 없는지 확인한다.
+"""
+import asyncio
+from contextlib import contextmanager
+from datetime import date
+
+import pytest
+from fastapi import Response
+from sqlalchemy import event, text
+
+from app.api.routes import actual as actual_routes
+from app.api.routes import report as report_routes
+from app.services.actual_service import actual_service
+from app.services.price_service import price_service
+from app.services.report_service import report_service
+from app.services.reprice_service import reprice_service
+from app.services.snapshot_catalog_service import snapshot_catalog_service
+from app.services.summary_service import summary_service
+
+START, END = date(2025, 1, 1), date(2025, 1, 31)
+
+
+@pytest.fixture
+def db(history_session):
+    session = history_session()
+    session.execute(text("""
+        INSERT INTO actual_records (date, model, process, quantity, unit_price, revenue, created_at, updated_at)
+        VALUES ('2025-01-02', 'M1', 'TRI', 10, 1.0, 10.0, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP),
+               ('2025-01-03', 'M2', '', 5, 2.0, 10.0, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
+    """))
+    session.execute(text("""
+        INSERT INTO forecast_snapshots
+            (upload_date, forecast_date, model, process, quantity, revenue, created_at, updated_at)
+        VALUES ('2025-01-05', '2025-01-10', 'M1', 'TRI', 20, 20.0, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
+    """))
+    snapshot_catalog_service.refresh(session)
+    session.commit()
+    yield session
+    session.close()
+    snapshot_catalog_service.invalidate()
+
+
+@contextmanager
+def captured(session):
+    """세션 연결에서 실행된 (SQL, 파라미터) 목록"""
+    statements = []
+    engine = session.get_bind()
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not executemany:
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def query_plan(session, statement, parameters=()):
+    return [
+        row[3] for row in
+        session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+    ]
+
+
+def assert_plan(session, statement, parameters, expected, temp_tables=()):
+    """기대 인덱스 사용 + 임시 테이블 외에는 인덱스 없는 SCAN 없음"""
+    plan = query_plan(session, statement, parameters)
+    full_scans = [
+        step for step in plan
+        if step.startswith("SCAN ") and "INDEX" not in step and "CONSTANT ROW" not in step
+        and step.split()[1] not in temp_tables
+    ]
+    assert any(expected in step for step in plan), (expected, statement, plan)
+    assert not full_scans, (statement, plan)
+
+
+def matching(statements, *fragments):
+    found = [
+        (statement, parameters) for statement, parameters in statements
+        if all(fragment in statement for fragment in fragments)
+    ]
+    assert found, fragments
+    return found
+
+
+def test_refresh_actual_uses_date_cover(db):
+    with captured(db) as statements:
+        summary_service.refresh_actual(db, START, END)
+
+    for statement, parameters in matching(statements, "FROM actual_records", "GROUP BY"):
+        assert_plan(db, statement, parameters, "ix_actual_records_date_cover")
+
+
+def test_refresh_forecast_uses_upload_cover(db):
+    with captured(db) as statements:
+        summary_service.refresh_forecast(db)
+
+    # 최신 업로드는 스냅샷 전체가 아닌 카탈로그에서 조회
+    for statement, parameters in matching(statements, "FROM forecast_uploads"):
+        assert_plan(db, statement, parameters, "forecast_uploads")
+    for statement, parameters in matching(statements, "FROM forecast_snapshots", "GROUP BY"):
+        assert_plan(db, statement, parameters, "ix_forecast_snapshots_upload_cover")
+
+
+def test_reprice_keys_use_indexes(db, monkeypatch):
+    # 단가가 없으면 키 조회까지만 실행
+    monkeypatch.setattr(price_service, "prices_at", lambda keys: [None for _ in keys])
+    with captured(db) as statements:
+        reprice_service._reprice_actual(db, START, END)
+        reprice_service._reprice_forecast(db, START, END)
+
+    # (date, model) 만 읽으므로 date 로 시작하는 어느 인덱스든 테이블 없이 처리
+    for statement, parameters in matching(statements, "DISTINCT", "FROM actual_records"):
+        assert_plan(db, statement, parameters, "COVERING INDEX")
+    for statement, parameters in matching(statements, "DISTINCT", "FROM forecast_snapshots"):
+        assert_plan(db, statement, parameters, "ix_forecast_snapshots_forecast_model_process")
+
+
+def test_duplicate_check_searches_by_key(db):
+    with captured(db) as statements:
+        actual_service._existing_records(db, [(date(2025, 1, 2), "M1", "TRI")])
+
+    # 키 임시 테이블은 조회 후 삭제되므로 같은 정의로 다시 만든 뒤 확인
+    (create, _), = matching(statements, "CREATE TEMP TABLE tmp_actual_keys")
+    db.connection().exec_driver_sql(create)
+    (statement, parameters), = matching(statements, "JOIN actual_records a")
+    # 임시 키 테이블은 처음부터 읽고 실적은 (date, model) 인덱스로 찾는다
+    assert_plan(db, statement, parameters, "SEARCH a USING COVERING INDEX", temp_tables=("k",))
+
+
+@pytest.mark.parametrize("filters, expected", [
+    ({}, "ix_actual_records_date"),
+    ({"start_date": START, "end_date": END}, "ix_actual_records_date"),
+    ({"model_prefix": "M", "process": "TRI"}, "ix_actual_records_"),
+])
+def test_actual_list_page_uses_indexes(db, filters, expected):
+    params = dict(
+        start_date=None, end_date=None, model=None, model_prefix=None, process=None,
+        limit=50, cursor=None, fields=None
+    )
+    params.update(filters)
+    with captured(db) as statements:
+        asyncio.run(actual_routes.get_actual_records(response=Response(), db=db, **params))
+
+    (statement, parameters), = matching(statements, "FROM actual_records", "LIMIT")
+    assert_plan(db, statement, parameters, expected)
+
+
+def test_report_detail_queries_use_covering_indexes(db):
+    with captured(db) as statements:
+        report_service.build_revenue_report(db, START, END, "combined", None, True)
+
+    for statement, parameters in matching(statements, "FROM actual_records", "ORDER BY"):
+        assert_plan(db, statement, parameters, "ix_actual_records_date_cover")
+    for statement, parameters in matching(statements, "FROM forecast_snapshots", "ORDER BY"):
+        assert_plan(db, statement, parameters, "ix_forecast_snapshots_upload_cover")
+
+
+def test_dashboard_reads_daily_summary_by_key(db):
+    summary_service.rebuild(db)
+    with captured(db) as statements:
+        report_routes._build_dashboard_metrics(db)
+
+    for statement, parameters in matching(statements, "FROM daily_summary"):
+        assert_plan(db, statement, parameters, "daily_summary")
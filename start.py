@@ -12,6 +12,7 @@ import time
 from pathlib import Path
 import webbrowser
 import threading
+import multiprocessing
 
 
 def is_frozen():
@@ -165,4 +166,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # 프로세스 풀(spawn) 자식 프로세스가 exe를 다시 실행하는 경우 처리
+    multiprocessing.freeze_support()
     main()